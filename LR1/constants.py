@@ -1,5 +1,10 @@
 TEXT_1 = 'Джек Воробей'
 TEXT_2 = 'Капитан Джек Воробей'
+LOAD_BUTTON_TEXT = 'Загрузить изображение'
+LOADING_BUTTON_TEXT = 'Загрузка...'
+OPEN_FOLDER_BUTTON_TEXT = 'Открыть папку'
+PREVIOUS_BUTTON_TEXT = '◀ Назад'
+NEXT_BUTTON_TEXT = 'Вперёд ▶'
 
 WINDOW_X = 100
 WINDOW_Y = 100
@@ -25,3 +30,12 @@ LABEL_PADDING = '15px'
 
 BACKGROUND_OPACITY = 0.7
 
+BACKGROUND_MEMORY_BUDGET_BYTES = 96 * 1024 * 1024
+RESIZE_SETTLE_MS = 150
+
+THUMBNAIL_SIZE = 96
+THUMBNAIL_STRIP_HEIGHT = 124
+THUMBNAIL_THREADS = 2
+THUMBNAIL_CACHE_DIR_NAME = 'lr1_thumbnails'
+PREFETCH_RADIUS = 2
+PREFETCH_THREADS = 2
@@ -0,0 +1,48 @@
+from PyQt5.QtCore import QObject, QRunnable, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader
+
+
+def read_scaled_image(file_path, target_size: QSize = None, mode=Qt.KeepAspectRatioByExpanding):
+    """Декодирует файл сразу в размер, подогнанный под target_size (без увеличения)."""
+    reader = QImageReader(file_path)
+    reader.setAutoTransform(True)
+    original_size = reader.size()
+
+    if target_size is not None and original_size.isValid():
+        scaled_size = original_size.scaled(target_size, mode)
+        if scaled_size.width() < original_size.width():
+            reader.setScaledSize(scaled_size)
+
+    image = reader.read()
+    return image, original_size, reader.errorString()
+
+
+class ImageLoadSignals(QObject):
+    loaded = pyqtSignal(int, QImage, QSize)
+    failed = pyqtSignal(int, str)
+
+
+class ImageLoadTask(QRunnable):
+    def __init__(self, request_id, file_path, target_size: QSize = None):
+        super().__init__()
+        self.request_id = request_id
+        self.file_path = file_path
+        self.target_size = target_size
+        self.started = False
+        self.cancelled = False
+        self.signals = ImageLoadSignals()
+
+    def cancel(self):
+        # Снятая задача, которая ещё ждёт в очереди пула, завершится сразу и ничего не пришлёт;
+        # уже начатое декодирование не прерывается
+        self.cancelled = True
+
+    def run(self):
+        self.started = True
+        if self.cancelled:
+            return
+        image, original_size, error = read_scaled_image(self.file_path, self.target_size)
+        if image.isNull():
+            self.signals.failed.emit(self.request_id, error)
+            return
+        self.signals.loaded.emit(self.request_id, image, original_size)
@@ -1,3 +1,4 @@
+import os
 import sys
 from PyQt5.QtWidgets import (
     QApplication,
@@ -8,23 +9,40 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QFileDialog,
     QMessageBox,
+    QShortcut,
 )
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QImage, QKeySequence
+from PyQt5.QtCore import Qt, QSize, QThreadPool
 
-from constants import TEXT_1, TEXT_2, WINDOW_X, WINDOW_Y, WINDOW_WIDTH, WINDOW_HEIGHT, MARGINS, SPACING, LABEL_MIN_HEIGHT
-from styles import MAIN_WINDOW_STYLE, LABEL_STYLE, BUTTON_STYLE
-from widgets import BackgroundWidget
+from constants import (
+    TEXT_1, TEXT_2, LOAD_BUTTON_TEXT, LOADING_BUTTON_TEXT,
+    OPEN_FOLDER_BUTTON_TEXT, PREVIOUS_BUTTON_TEXT, NEXT_BUTTON_TEXT,
+    WINDOW_X, WINDOW_Y, WINDOW_WIDTH, WINDOW_HEIGHT, MARGINS, SPACING, LABEL_MIN_HEIGHT
+)
+from styles import MAIN_WINDOW_STYLE, LABEL_STYLE, BUTTON_STYLE, THUMBNAIL_STRIP_STYLE
+from widgets import BackgroundWidget, ThumbnailStrip
+from loader import ImageLoadTask
+from slideshow import FolderSlideshow
+
+
+LOADING_IMAGE = 'image'
+LOADING_SLIDE = 'slide'
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.text_is_changed = False
+        self.thread_pool = QThreadPool(self)
+        self.load_request_id = 0
+        self.loading_file_path = None
+        # Что сейчас загружается: одиночный файл и/или слайд, индикатор общий
+        self.loading_sources = set()
         self._setup_window()
         self._create_layout()
         self._create_label()
         self._create_buttons()
+        self._create_slideshow()
 
     def _setup_window(self):
         self.setWindowTitle("Приложение на PyQT")
@@ -58,11 +76,49 @@ class MainWindow(QMainWindow):
         self.button1.setStyleSheet(BUTTON_STYLE)
         buttons_layout.addWidget(self.button1)
 
-        self.button2 = QPushButton("Загрузить изображение")
+        self.button2 = QPushButton(LOAD_BUTTON_TEXT)
         self.button2.clicked.connect(self.load_transparent_image)
         self.button2.setStyleSheet(BUTTON_STYLE)
         buttons_layout.addWidget(self.button2)
 
+    def _create_slideshow(self):
+        self.slideshow = FolderSlideshow(self)
+        self.slideshow.loading.connect(self.on_slide_loading)
+        self.slideshow.image_ready.connect(self.on_slide_ready)
+        self.slideshow.image_failed.connect(self.on_slide_failed)
+        self.central_widget.set_slideshow(self.slideshow)
+
+        slideshow_layout = QHBoxLayout()
+        slideshow_layout.setSpacing(SPACING)
+        self.main_layout.addLayout(slideshow_layout)
+
+        self.previous_button = QPushButton(PREVIOUS_BUTTON_TEXT)
+        self.previous_button.clicked.connect(self.slideshow.previous)
+        self.previous_button.setStyleSheet(BUTTON_STYLE)
+        self.previous_button.setEnabled(False)
+        slideshow_layout.addWidget(self.previous_button)
+
+        self.open_folder_button = QPushButton(OPEN_FOLDER_BUTTON_TEXT)
+        self.open_folder_button.clicked.connect(self.open_folder)
+        self.open_folder_button.setStyleSheet(BUTTON_STYLE)
+        slideshow_layout.addWidget(self.open_folder_button)
+
+        self.next_button = QPushButton(NEXT_BUTTON_TEXT)
+        self.next_button.clicked.connect(self.slideshow.next)
+        self.next_button.setStyleSheet(BUTTON_STYLE)
+        self.next_button.setEnabled(False)
+        slideshow_layout.addWidget(self.next_button)
+
+        self.thumbnail_strip = ThumbnailStrip()
+        self.thumbnail_strip.setStyleSheet(THUMBNAIL_STRIP_STYLE)
+        self.thumbnail_strip.currentRowChanged.connect(self.slideshow.go_to)
+        self.thumbnail_strip.hide()
+        self.slideshow.thumbnail_ready.connect(self.thumbnail_strip.set_thumbnail)
+        self.main_layout.addWidget(self.thumbnail_strip)
+
+        QShortcut(QKeySequence(Qt.Key_Left), self, self.previous_button.click)
+        QShortcut(QKeySequence(Qt.Key_Right), self, self.next_button.click)
+
     def change_label_text(self):
         if self.text_is_changed:
             self.label.setText(TEXT_1)
@@ -81,15 +137,81 @@ class MainWindow(QMainWindow):
         if not file_path:
             return
 
-        pixmap = QPixmap(file_path)
-        if pixmap.isNull():
-            QMessageBox.critical(self, "Ошибка", "Не удалось загрузить изображение.")
+        self.start_image_load(file_path)
+
+    def open_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Выберите папку с изображениями")
+        if not folder:
             return
 
-        self.central_widget.set_background_pixmap(pixmap)
+        files = self.slideshow.open_folder(folder, self.screen().size())
+        if not files:
+            QMessageBox.information(self, "Слайд-шоу", "В папке нет изображений.")
+
+        self.thumbnail_strip.set_files(files)
+        self.thumbnail_strip.setVisible(bool(files))
+        self.previous_button.setEnabled(len(files) > 1)
+        self.next_button.setEnabled(len(files) > 1)
+        if files:
+            self.thumbnail_strip.select(self.slideshow.current_index)
+
+    def on_slide_loading(self, index):
+        self.thumbnail_strip.select(index)
+        self._set_loading(LOADING_SLIDE, True)
+
+    def on_slide_ready(self, index, image: QImage, original_size: QSize):
+        self.thumbnail_strip.select(index)
+        self._set_loading(LOADING_SLIDE, False)
+        self.central_widget.set_background_pixmap(
+            QPixmap.fromImage(image), self.slideshow.files[index], original_size
+        )
+
+    def on_slide_failed(self, index):
+        self._set_loading(LOADING_SLIDE, False)
+        QMessageBox.critical(
+            self, "Ошибка", f"Не удалось загрузить изображение {os.path.basename(self.slideshow.files[index])}."
+        )
 
-        img_width = pixmap.width()
-        img_height = pixmap.height()
+    def start_image_load(self, file_path):
+        # Декодирование идёт в пуле потоков сразу в размер экрана,
+        # более ранние незавершённые загрузки просто игнорируются
+        self.load_request_id += 1
+        self.loading_file_path = file_path
+        task = ImageLoadTask(self.load_request_id, file_path, self.screen().size())
+        task.signals.loaded.connect(self.on_image_loaded)
+        task.signals.failed.connect(self.on_image_failed)
+        self._set_loading(LOADING_IMAGE, True)
+        self.thread_pool.start(task)
+
+    def _set_loading(self, source, loading):
+        if loading:
+            self.loading_sources.add(source)
+        else:
+            self.loading_sources.discard(source)
+        loading = bool(self.loading_sources)
+        self.button2.setEnabled(not loading)
+        self.button2.setText(LOADING_BUTTON_TEXT if loading else LOAD_BUTTON_TEXT)
+        if loading:
+            self.setCursor(Qt.BusyCursor)
+        else:
+            self.unsetCursor()
+
+    def on_image_failed(self, request_id, error):
+        if request_id != self.load_request_id:
+            return
+        self._set_loading(LOADING_IMAGE, False)
+        QMessageBox.critical(self, "Ошибка", "Не удалось загрузить изображение.")
+
+    def on_image_loaded(self, request_id, image: QImage, original_size: QSize):
+        if request_id != self.load_request_id:
+            return
+        self._set_loading(LOADING_IMAGE, False)
+
+        pixmap = QPixmap.fromImage(image)
+        self.central_widget.set_background_pixmap(pixmap, self.loading_file_path, original_size)
+
+        img_width = original_size.width()
+        img_height = original_size.height()
         screen = self.screen().availableGeometry()
 
         if img_width > screen.width() or img_height > screen.height():
@@ -97,7 +219,6 @@ class MainWindow(QMainWindow):
         else:
             self.resize(img_width, img_height)
 
-
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainWindow()
@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QPixmap
+
+
+def pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+class ScaledPixmapCache:
+    """LRU-кэш масштабированных копий фона, ключ - целевой размер."""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self._entries = OrderedDict()
+
+    def get(self, size: QSize):
+        key = (size.width(), size.height())
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+        return pixmap
+
+    def put(self, size: QSize, pixmap: QPixmap):
+        key = (size.width(), size.height())
+        cost = pixmap_bytes(pixmap)
+        if cost > self.budget_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.used_bytes -= pixmap_bytes(previous)
+
+        self._entries[key] = pixmap
+        self.used_bytes += cost
+        self._evict()
+
+    def set_budget(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self.used_bytes = 0
+
+    def _evict(self):
+        while self.used_bytes > self.budget_bytes and self._entries:
+            _, pixmap = self._entries.popitem(last=False)
+            self.used_bytes -= pixmap_bytes(pixmap)
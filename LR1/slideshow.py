@@ -0,0 +1,221 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QRunnable, QSize, QStandardPaths, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader
+
+from constants import (
+    THUMBNAIL_SIZE, THUMBNAIL_THREADS, THUMBNAIL_CACHE_DIR_NAME,
+    PREFETCH_RADIUS, PREFETCH_THREADS, BACKGROUND_MEMORY_BUDGET_BYTES
+)
+from loader import ImageLoadTask, read_scaled_image
+
+
+def list_images(folder):
+    suffixes = {bytes(fmt).decode().lower() for fmt in QImageReader.supportedImageFormats()}
+    return sorted(
+        str(path) for path in Path(folder).iterdir()
+        if path.is_file() and path.suffix[1:].lower() in suffixes
+    )
+
+
+class ThumbnailCache:
+    """Кэш миниатюр на диске, ключ - путь, mtime и размер файла."""
+
+    def __init__(self, directory=None):
+        if directory is None:
+            base = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+            directory = Path(base) / THUMBNAIL_CACHE_DIR_NAME
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, file_path):
+        stat = os.stat(file_path)
+        key = f'{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{THUMBNAIL_SIZE}'
+        return self.directory / (hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+
+    def load(self, file_path):
+        try:
+            entry_path = self._entry_path(file_path)
+        except OSError:
+            return None
+        if not entry_path.exists():
+            return None
+        image = QImage(str(entry_path))
+        return None if image.isNull() else image
+
+    def store(self, file_path, image: QImage):
+        try:
+            entry_path = self._entry_path(file_path)
+        except OSError:
+            return
+        # Запись через временный файл, чтобы не оставить битую миниатюру
+        tmp_path = entry_path.with_name(f'{entry_path.name}.{threading.get_ident()}.tmp')
+        if image.save(str(tmp_path), 'PNG'):
+            os.replace(tmp_path, entry_path)
+
+
+class ThumbnailSignals(QObject):
+    ready = pyqtSignal(int, int, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    def __init__(self, generation, index, file_path, cache: ThumbnailCache):
+        super().__init__()
+        self.generation = generation
+        self.index = index
+        self.file_path = file_path
+        self.cache = cache
+        self.signals = ThumbnailSignals()
+
+    def run(self):
+        image = self.cache.load(self.file_path)
+        if image is None:
+            image, _, _ = read_scaled_image(
+                self.file_path, QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE), Qt.KeepAspectRatio
+            )
+            if image.isNull():
+                return
+            self.cache.store(self.file_path, image)
+        self.signals.ready.emit(self.generation, self.index, image)
+
+
+class FolderSlideshow(QObject):
+    """Листание изображений папки с упреждающим декодированием соседей."""
+
+    loading = pyqtSignal(int)
+    image_ready = pyqtSignal(int, QImage, QSize)
+    image_failed = pyqtSignal(int)
+    thumbnail_ready = pyqtSignal(int, QImage)
+    cache_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.files = []
+        self.current_index = -1
+        self.target_size = QSize()
+        self.generation = 0
+        self.decoded = {}
+        # request_id -> (индекс, задача декодирования)
+        self.pending = {}
+        self.memory_budget = BACKGROUND_MEMORY_BUDGET_BYTES
+        self.last_request_id = 0
+        self.thumbnail_cache = ThumbnailCache()
+
+        self.decode_pool = QThreadPool(self)
+        self.decode_pool.setMaxThreadCount(PREFETCH_THREADS)
+        self.thumbnail_pool = QThreadPool(self)
+        self.thumbnail_pool.setMaxThreadCount(THUMBNAIL_THREADS)
+
+    def open_folder(self, folder, target_size: QSize):
+        self.generation += 1
+        self.files = list_images(folder)
+        self.current_index = -1
+        self.target_size = target_size
+        self.decoded.clear()
+        self.pending.clear()
+        self.decode_pool.clear()
+        self.thumbnail_pool.clear()
+        self.cache_changed.emit()
+
+        for index, file_path in enumerate(self.files):
+            task = ThumbnailTask(self.generation, index, file_path, self.thumbnail_cache)
+            task.signals.ready.connect(self._on_thumbnail_ready)
+            self.thumbnail_pool.start(task)
+
+        if self.files:
+            self.go_to(0)
+        return self.files
+
+    def go_to(self, index):
+        # -1 приходит от списка миниатюр, когда в нём не осталось выбранной строки
+        if not self.files or index < 0:
+            return
+        self.current_index = index % len(self.files)
+        decoded = self.decoded.get(self.current_index)
+        if decoded is not None:
+            self.image_ready.emit(self.current_index, *decoded)
+        else:
+            self.loading.emit(self.current_index)
+        self._prefetch()
+
+    def next(self):
+        self.go_to(self.current_index + 1)
+
+    def previous(self):
+        if self.files:
+            self.go_to((self.current_index - 1) % len(self.files))
+
+    def _prefetch_window(self):
+        count = len(self.files)
+        window = [self.current_index]
+        for offset in range(1, PREFETCH_RADIUS + 1):
+            for index in ((self.current_index + offset) % count, (self.current_index - offset) % count):
+                if index not in window:
+                    window.append(index)
+        return window
+
+    def decoded_bytes(self):
+        return sum(image.sizeInBytes() for image, _ in self.decoded.values())
+
+    def set_memory_budget(self, budget_bytes: int):
+        self.memory_budget = budget_bytes
+        self._evict()
+
+    def _evict(self):
+        used = self.decoded_bytes()
+        if used <= self.memory_budget:
+            return
+        # Сначала вытесняются самые дальние от текущего соседи
+        for index in reversed(self._prefetch_window()):
+            decoded = self.decoded.pop(index, None)
+            if decoded is not None:
+                used -= decoded[0].sizeInBytes()
+                if used <= self.memory_budget:
+                    break
+
+    def _prefetch(self):
+        window = self._prefetch_window()
+        for index in list(self.decoded):
+            if index not in window:
+                del self.decoded[index]
+
+        # Задачи, которые ещё ждут в очереди, снимаем: вне окна они не нужны,
+        # а соседей окна ставим заново с приоритетами по новой текущей позиции
+        for request_id, (index, task) in list(self.pending.items()):
+            if not task.started:
+                task.cancel()
+                del self.pending[request_id]
+
+        in_flight = {index for index, _ in self.pending.values()}
+        for priority, index in enumerate(reversed(window)):
+            if index in self.decoded or index in in_flight:
+                continue
+            self.last_request_id += 1
+            task = ImageLoadTask(self.last_request_id, self.files[index], self.target_size)
+            task.signals.loaded.connect(self._on_image_loaded)
+            task.signals.failed.connect(self._on_image_failed)
+            self.pending[self.last_request_id] = (index, task)
+            self.decode_pool.start(task, priority)
+        self.cache_changed.emit()
+
+    def _on_image_loaded(self, request_id, image: QImage, original_size: QSize):
+        index, _ = self.pending.pop(request_id, (None, None))
+        if index is None or index not in self._prefetch_window():
+            return
+        self.decoded[index] = (image, original_size)
+        self._evict()
+        self.cache_changed.emit()
+        if index == self.current_index:
+            self.image_ready.emit(index, image, original_size)
+
+    def _on_image_failed(self, request_id, error):
+        index, _ = self.pending.pop(request_id, (None, None))
+        if index is not None and index == self.current_index:
+            self.image_failed.emit(index)
+
+    def _on_thumbnail_ready(self, generation, index, image: QImage):
+        if generation == self.generation:
+            self.thumbnail_ready.emit(index, image)
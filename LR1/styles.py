@@ -45,3 +45,15 @@ BUTTON_STYLE = f"""
     }}
 """
 
+
+THUMBNAIL_STRIP_STYLE = f"""
+    QListWidget {{
+        background-color: {COLOR_LABEL_BG};
+        border: 2px solid {COLOR_LABEL_BORDER};
+        border-radius: 10px;
+    }}
+    QListWidget::item:selected {{
+        background-color: {COLOR_BUTTON_HOVER};
+        border-radius: 6px;
+    }}
+"""
@@ -1,37 +1,233 @@
-from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPainter, QColor, QLinearGradient, QPixmap
-from PyQt5.QtCore import Qt
-from constants import COLOR_DARK, COLOR_LIGHT, BACKGROUND_OPACITY
+import os
+
+from PyQt5.QtWidgets import QWidget, QListWidget, QListWidgetItem, QListView
+from PyQt5.QtGui import QPainter, QColor, QLinearGradient, QPixmap, QImage, QIcon
+from PyQt5.QtCore import Qt, QTimer, QSize, QThreadPool
+from constants import (
+    COLOR_DARK, COLOR_LIGHT, BACKGROUND_OPACITY, BACKGROUND_MEMORY_BUDGET_BYTES, RESIZE_SETTLE_MS,
+    THUMBNAIL_SIZE, THUMBNAIL_STRIP_HEIGHT
+)
+from loader import ImageLoadTask
+from pixmap_cache import ScaledPixmapCache, pixmap_bytes
 
 
 class BackgroundWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.background_pixmap = None
+        self.memory_budget = BACKGROUND_MEMORY_BUDGET_BYTES
+        self.scaled_cache = ScaledPixmapCache(self.memory_budget)
+        # Слайд-шоу, чьи декодированные соседи входят в тот же бюджет памяти
+        self.slideshow = None
+        # Оригинал не храним: только копию под самый большой экран,
+        # при необходимости перечитываем файл по source_path
+        self.source_path = None
+        self.original_size = QSize()
+        self.max_screen_size = QSize()
+        self.reload_request_id = 0
+        # Свой пул: глобальный Qt использует для гладкого масштабирования
+        self.reload_pool = QThreadPool(self)
+        self.reload_pool.setMaxThreadCount(1)
+        self.window_handle = None
+        self.is_resizing = False
+        # Готовый слой фона: прозрачность и градиент уже применены
+        self.background_layer = None
+        self.layer_is_smooth = False
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setAutoFillBackground(False)
 
-    def set_background_pixmap(self, pixmap: QPixmap):
+        # Пока окно тянут, рисуем быстрый масштаб; гладкий - после паузы
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(RESIZE_SETTLE_MS)
+        self.resize_timer.timeout.connect(self._on_resize_settled)
+
+    def set_background_pixmap(self, pixmap: QPixmap, source_path=None, original_size: QSize = None):
+        self.source_path = source_path
+        self.original_size = QSize(original_size) if original_size is not None else pixmap.size()
+        self.reload_request_id += 1
+        self._install_background(self._fit_to_retention(pixmap))
+
+    def set_memory_budget(self, budget_bytes: int):
+        self.memory_budget = budget_bytes
+        self._apply_memory_budget()
+
+    def set_slideshow(self, slideshow):
+        self.slideshow = slideshow
+        slideshow.cache_changed.connect(self._apply_memory_budget)
+        self._apply_memory_budget()
+
+    def pixmap_memory_usage(self):
+        background = pixmap_bytes(self.background_pixmap) if self.background_pixmap else 0
+        layer = self.background_layer.sizeInBytes() if self.background_layer is not None else 0
+        scaled_cache = self.scaled_cache.used_bytes
+        slideshow = self.slideshow.decoded_bytes() if self.slideshow is not None else 0
+        return {
+            'background': background,
+            'scaled_cache': scaled_cache,
+            'layer': layer,
+            'slideshow': slideshow,
+            'total': background + scaled_cache + layer + slideshow,
+        }
+
+    def _install_background(self, pixmap):
         self.background_pixmap = pixmap
+        self.scaled_cache.clear()
+        self.background_layer = None
+        self._apply_memory_budget()
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+    def _apply_memory_budget(self):
+        usage = self.pixmap_memory_usage()
+        available = max(0, self.memory_budget - usage['background'] - usage['layer'])
+        if self.slideshow is not None:
+            # Соседи слайд-шоу важнее масштабированных копий: без них листание ждёт декодирования
+            self.slideshow.set_memory_budget(available)
+            available = max(0, available - self.slideshow.decoded_bytes())
+        self.scaled_cache.set_budget(available)
 
-        if self.background_pixmap:
-            scaled_pixmap = self.background_pixmap.scaled(
-                self.size(),
+    def _retained_size(self):
+        if self.max_screen_size.isEmpty():
+            return self.original_size
+        target = self.original_size.scaled(self.max_screen_size, Qt.KeepAspectRatioByExpanding)
+        if target.width() < self.original_size.width():
+            return target
+        return self.original_size
+
+    def _fit_to_retention(self, pixmap):
+        target = self._retained_size()
+        if pixmap.width() > target.width():
+            return pixmap.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return pixmap
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        window_handle = self.window().windowHandle()
+        if window_handle is not None and window_handle is not self.window_handle:
+            self.window_handle = window_handle
+            window_handle.screenChanged.connect(self._note_screen)
+        self._note_screen(self.screen())
+
+    def _note_screen(self, screen):
+        if screen is None:
+            return
+        screen_size = screen.size()
+        if (screen_size.width() <= self.max_screen_size.width()
+                and screen_size.height() <= self.max_screen_size.height()):
+            return
+        self.max_screen_size = self.max_screen_size.expandedTo(screen_size)
+
+        if not self.background_pixmap:
+            return
+        target = self._retained_size()
+        if self.background_pixmap.width() > target.width():
+            self._install_background(self._fit_to_retention(self.background_pixmap))
+        elif self.background_pixmap.width() < target.width() and self.source_path:
+            self._reload_background()
+
+    def _reload_background(self):
+        self.reload_request_id += 1
+        task = ImageLoadTask(self.reload_request_id, self.source_path, self.max_screen_size)
+        task.signals.loaded.connect(self._on_background_reloaded)
+        self.reload_pool.start(task)
+
+    def _on_background_reloaded(self, request_id, image: QImage, original_size: QSize):
+        if request_id != self.reload_request_id:
+            return
+        self._install_background(self._fit_to_retention(QPixmap.fromImage(image)))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.background_layer = None
+        if self.background_pixmap and self.isVisible():
+            self.is_resizing = True
+            self.resize_timer.start()
+
+    def _on_resize_settled(self):
+        self.is_resizing = False
+        if not self.layer_is_smooth:
+            self.background_layer = None
+            self.update()
+
+    def _scaled_background(self):
+        size = self.size()
+        scaled_pixmap = self.scaled_cache.get(size)
+        if scaled_pixmap is not None:
+            return scaled_pixmap
+
+        if self.is_resizing:
+            return self.background_pixmap.scaled(
+                size,
                 Qt.KeepAspectRatioByExpanding,
-                Qt.SmoothTransformation
+                Qt.FastTransformation
             )
+
+        scaled_pixmap = self.background_pixmap.scaled(
+            size,
+            Qt.KeepAspectRatioByExpanding,
+            Qt.SmoothTransformation
+        )
+        self.scaled_cache.put(size, scaled_pixmap)
+        return scaled_pixmap
+
+    def _build_background_layer(self):
+        layer = QImage(self.size(), QImage.Format_ARGB32_Premultiplied)
+        layer.fill(Qt.transparent)
+
+        painter = QPainter(layer)
+        if self.background_pixmap:
             painter.setOpacity(BACKGROUND_OPACITY)
-            painter.drawPixmap(0, 0, scaled_pixmap)
+            painter.drawPixmap(0, 0, self._scaled_background())
         else:
             gradient = QLinearGradient(0, 0, self.width(), self.height())
             gradient.setColorAt(0, QColor(COLOR_DARK))
             gradient.setColorAt(1, QColor(COLOR_LIGHT))
-            painter.fillRect(self.rect(), gradient)
+            painter.fillRect(layer.rect(), gradient)
+        painter.end()
 
+        self.background_layer = layer
+        self.layer_is_smooth = not (self.background_pixmap and self.is_resizing)
+        self._apply_memory_budget()
+
+    def paintEvent(self, event):
+        if self.background_layer is None:
+            self._build_background_layer()
+
+        dirty_rect = event.rect()
+        painter = QPainter(self)
+        painter.drawImage(dirty_rect, self.background_layer, dirty_rect)
         painter.end()
 
+
+class ThumbnailStrip(QListWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.setFixedHeight(THUMBNAIL_STRIP_HEIGHT)
+
+    def set_files(self, files):
+        # clear() сбрасывает текущую строку в -1, слайд-шоу об этом знать не нужно
+        self.blockSignals(True)
+        self.clear()
+        for file_path in files:
+            item = QListWidgetItem()
+            item.setToolTip(os.path.basename(file_path))
+            item.setSizeHint(QSize(THUMBNAIL_SIZE + 8, THUMBNAIL_SIZE + 8))
+            self.addItem(item)
+        self.blockSignals(False)
+
+    def set_thumbnail(self, index, image: QImage):
+        item = self.item(index)
+        if item is not None:
+            item.setIcon(QIcon(QPixmap.fromImage(image)))
+
+    def select(self, index):
+        self.blockSignals(True)
+        self.setCurrentRow(index)
+        self.blockSignals(False)
+        self.scrollToItem(self.item(index))
@@ -0,0 +1,197 @@
+"""
+Консольный пакетный конвертер валют без графического интерфейса.
+
+Читает CSV с суммами и кодами валют порциями, пересчитывает их
+в целевые валюты по одному снимку курсов и построчно дописывает
+результат в выходной файл, поэтому расход памяти не зависит от размера файла.
+
+Пример:
+    python convert_cli.py payments.csv converted.csv --to EUR,RUB
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+import urllib.request
+from itertools import islice
+
+from rates import RatesCache, conversion_factors, convert_amounts
+from rates.cache import CACHE_PATH, RATES_TTL_SECONDS
+from rates.api import API_URL, parse_rates
+
+
+CHUNK_SIZE = 50000
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+
+def positive_int(text):
+    """Целое число больше нуля для аргументов командной строки."""
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f'ожидается число больше нуля: {text}')
+    return value
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description='Пакетная конвертация сумм из CSV.')
+    parser.add_argument('input', help='входной CSV-файл ("-" - stdin)')
+    parser.add_argument('output', help='выходной CSV-файл ("-" - stdout)')
+    parser.add_argument('--to', required=True,
+                        help='целевые валюты через запятую, например EUR,RUB')
+    parser.add_argument('--amount-column', default='amount', help='колонка с суммой')
+    parser.add_argument('--currency-column', default='currency', help='колонка с кодом валюты')
+    parser.add_argument('--delimiter', default=',', help='разделитель CSV')
+    parser.add_argument('--chunk-size', type=positive_int, default=CHUNK_SIZE,
+                        help='число строк в одной порции')
+    parser.add_argument('--rates', default=CACHE_PATH,
+                        help='файл кэша курсов (по умолчанию кэш приложения)')
+    parser.add_argument('--fetch', action='store_true',
+                        help='загрузить свежие курсы с API вместо кэша')
+    return parser.parse_args(argv)
+
+
+def load_rates(args):
+    """Получение одного снимка курсов: из кэша или с API. None при ошибке загрузки."""
+    cache = RatesCache(args.rates, RATES_TTL_SECONDS)
+    if not args.fetch and cache.load():
+        if cache.is_stale():
+            print('Внимание: курсы в кэше устарели', file=sys.stderr)
+        return cache.rates
+
+    try:
+        with urllib.request.urlopen(API_URL, timeout=30) as response:
+            data = json.load(response)
+    except (OSError, ValueError) as error:
+        print(f'Ошибка загрузки курсов с {API_URL}: {error}', file=sys.stderr)
+        return None
+    rates = parse_rates(data)
+    if rates is None:
+        print(f'В ответе {API_URL} нет таблицы курсов', file=sys.stderr)
+        return None
+    cache.update(data.get('base_code', 'USD'), rates)
+    return rates
+
+
+def parse_amount(text):
+    """Разбор суммы; None, если строка не является числом."""
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def convert_stream(reader, writer, targets, factors_by_target, amount_index,
+                   currency_index, chunk_size, header_width=0):
+    """
+    Пересчёт строк CSV порциями. Возвращает число обработанных строк.
+
+    Пустые строки пропускаются. Короткие строки дополняются пустыми полями
+    до ширины заголовка header_width, чтобы пересчитанные поля попали в свои
+    колонки; в строках без нужных колонок они остаются пустыми.
+    """
+    total_rows = 0
+    short_rows = 0
+    width = max(amount_index, currency_index) + 1
+    started = time.perf_counter()
+    last_report = started
+
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            break
+        chunk = [row for row in chunk if row]
+        complete = [len(row) >= width for row in chunk]
+        short_rows += complete.count(False)
+
+        amounts = [parse_amount(row[amount_index]) if ok else None
+                   for row, ok in zip(chunk, complete)]
+        currencies = [row[currency_index].strip().upper() if ok else ''
+                      for row, ok in zip(chunk, complete)]
+        for row in chunk:
+            if len(row) < header_width:
+                row.extend([''] * (header_width - len(row)))
+        columns = [
+            convert_amounts(amounts, currencies, factors_by_target[target])
+            for target in targets
+        ]
+
+        writer.writerows(
+            row + ['' if value is None else f'{value:.2f}' for value in values]
+            for row, values in zip(chunk, zip(*columns))
+        )
+
+        total_rows += len(chunk)
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+            last_report = now
+            print(f'{total_rows} строк, {total_rows / (now - started):.0f} строк/с',
+                  file=sys.stderr)
+
+    if short_rows:
+        print(f'Строк без нужных колонок: {short_rows}, они не пересчитаны', file=sys.stderr)
+    return total_rows
+
+
+def open_text(path, mode):
+    """Открытие файла или стандартного потока для CSV."""
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(path, mode, newline='', encoding='utf-8')
+
+
+def main(argv=None):
+    """Точка входа консольного конвертера."""
+    args = parse_args(argv)
+    targets = [code.strip().upper() for code in args.to.split(',') if code.strip()]
+
+    rates = load_rates(args)
+    if rates is None:
+        return 1
+    factors_by_target = {}
+    for target in targets:
+        factors = conversion_factors(rates, target)
+        if not factors:
+            print(f'Неизвестная валюта: {target}', file=sys.stderr)
+            return 2
+        factors_by_target[target] = factors
+
+    input_file = open_text(args.input, 'r')
+    output_file = open_text(args.output, 'w')
+    try:
+        reader = csv.reader(input_file, delimiter=args.delimiter)
+        writer = csv.writer(output_file, delimiter=args.delimiter)
+
+        header = next(reader, None)
+        if header is None:
+            print('Пустой входной файл', file=sys.stderr)
+            return 1
+        try:
+            amount_index = header.index(args.amount_column)
+            currency_index = header.index(args.currency_column)
+        except ValueError as error:
+            print(f'Нет нужной колонки: {error}', file=sys.stderr)
+            return 1
+        writer.writerow(header + [f'{args.amount_column}_{target}' for target in targets])
+
+        started = time.perf_counter()
+        total_rows = convert_stream(reader, writer, targets, factors_by_target,
+                                    amount_index, currency_index, args.chunk_size,
+                                    len(header))
+        elapsed = time.perf_counter() - started
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    rate = total_rows / elapsed if elapsed > 0 else 0
+    print(f'Готово: {total_rows} строк за {elapsed:.2f} с ({rate:.0f} строк/с)',
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,12 @@
 """
-Приложение на PyQt5 для конвертации между валютами USD, EUR и RUB
-с использованием актуальных курсов валют из внешнего API.
+Приложение на PyQt5 для конвертации между любыми валютами
+(по умолчанию USD, EUR и RUB) с использованием актуальных курсов из внешнего API.
 """
 
 import sys
 from PyQt5.QtWidgets import QApplication
 
-from signals import UsdSignals, EurSignals, RubSignals, CommonSignals
+from signals import CurrencySignals, CommonSignals
 from widgets import CurrencyConverterWidget
 
 
@@ -15,18 +15,11 @@ def main():
     app = QApplication(sys.argv)
 
     # Создание экземпляров сигналов
-    usd_signals = UsdSignals()
-    eur_signals = EurSignals()
-    rub_signals = RubSignals()
+    currency_signals = CurrencySignals()
     common_signals = CommonSignals()
 
     # Создание и отображение главного виджета
-    converter = CurrencyConverterWidget(
-        usd_signals, 
-        eur_signals, 
-        rub_signals, 
-        common_signals
-    )
+    converter = CurrencyConverterWidget(currency_signals, common_signals)
     converter.show()
 
     sys.exit(app.exec_())
@@ -0,0 +1,22 @@
+"""
+Модуль работы с курсами валют.
+
+Содержит локальный кэш курсов, планировщик их обновления, расчёт
+кросс-курсов и историю курсов.
+"""
+
+from .cache import RatesCache
+from .downsample import lttb
+from .engine import RateVector, cross_rate, conversion_factors, convert_amounts
+from .history import RatesHistory
+
+__all__ = ['RatesCache', 'RatesRefresher', 'RateVector', 'cross_rate',
+           'conversion_factors', 'convert_amounts', 'RatesHistory', 'lttb']
+
+
+def __getattr__(name):
+    """Планировщик импортируется по требованию: консольному конвертеру PyQt5 не нужен."""
+    if name == 'RatesRefresher':
+        from .refresher import RatesRefresher
+        return RatesRefresher
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
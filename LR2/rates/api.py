@@ -0,0 +1,20 @@
+"""Модуль параметров API курсов валют, не зависящий от Qt."""
+
+import os
+
+
+API_URL = os.environ.get('RATES_API_URL', "http://open.er-api.com/v6/latest/USD")
+
+
+def parse_rates(data):
+    """
+    Таблица курсов из ответа API или None, если её нет или она некорректна:
+    ответ с ошибкой не должен затирать сохранённые курсы.
+    """
+    rates = data.get('rates') if isinstance(data, dict) else None
+    if not isinstance(rates, dict) or not rates:
+        return None
+    for code, value in rates.items():
+        if not isinstance(code, str) or isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+    return rates
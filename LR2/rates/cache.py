@@ -0,0 +1,90 @@
+"""Модуль локального кэша курсов валют."""
+
+import json
+import os
+import time
+from pathlib import Path
+
+
+CACHE_PATH = os.environ.get(
+    'RATES_CACHE_PATH',
+    str(Path(__file__).resolve().parent.parent / 'rates_cache.json')
+)
+RATES_TTL_SECONDS = 60 * 60
+
+
+class RatesCache:
+    """
+    Кэш курсов валют в JSON-файле.
+
+    Хранит полную таблицу курсов, время загрузки и валидаторы HTTP
+    (ETag, Last-Modified) для условных запросов к API.
+    """
+
+    def __init__(self, path, ttl_seconds):
+        """Инициализация кэша с путём к файлу и временем жизни данных."""
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.base = None
+        self.rates = {}
+        self.fetched_at = None
+        self.etag = None
+        self.last_modified = None
+
+    def load(self):
+        """Загрузка кэша с диска. Возвращает True, если курсы есть."""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        self.base = data.get('base')
+        self.rates = data.get('rates', {})
+        self.fetched_at = data.get('fetched_at')
+        self.etag = data.get('etag')
+        self.last_modified = data.get('last_modified')
+        return bool(self.rates)
+
+    def save(self):
+        """Атомарная запись кэша на диск через временный файл."""
+        data = {
+            'base': self.base,
+            'rates': self.rates,
+            'fetched_at': self.fetched_at,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tmp_path, self.path)
+        except OSError as error:
+            print(f"Ошибка при сохранении кэша курсов: {error}")
+
+    def update(self, base, rates, etag=None, last_modified=None):
+        """Сохранение новых курсов, полученных от API."""
+        self.base = base
+        self.rates = rates
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.time()
+        self.save()
+
+    def touch(self):
+        """Продление срока жизни курсов после ответа 304 Not Modified."""
+        self.fetched_at = time.time()
+        self.save()
+
+    def age_seconds(self):
+        """Возраст данных в секундах или None, если данных нет."""
+        if self.fetched_at is None:
+            return None
+        return max(0.0, time.time() - self.fetched_at)
+
+    def is_stale(self):
+        """Проверка, истёк ли срок жизни курсов."""
+        age = self.age_seconds()
+        return age is None or age > self.ttl_seconds
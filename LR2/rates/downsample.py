@@ -0,0 +1,53 @@
+"""Модуль прореживания временных рядов для графиков."""
+
+
+def lttb(xs, ys, threshold):
+    """
+    Прореживание ряда алгоритмом Largest-Triangle-Three-Buckets.
+
+    Оставляет threshold точек, сохраняя визуальную форму графика:
+    из каждой корзины берётся точка, образующая наибольший треугольник
+    с выбранной точкой предыдущей корзины и средним следующей.
+    """
+    count = len(xs)
+    if threshold >= count or threshold < 3:
+        return list(xs), list(ys)
+
+    bucket_size = (count - 2) / (threshold - 2)
+    sampled_x = [xs[0]]
+    sampled_y = [ys[0]]
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        if next_end <= next_start:
+            avg_x, avg_y = xs[-1], ys[-1]
+        else:
+            span = next_end - next_start
+            avg_x = sum(xs[next_start:next_end]) / span
+            avg_y = sum(ys[next_start:next_end]) / span
+
+        point_x = xs[selected]
+        point_y = ys[selected]
+        best_area = -1.0
+        best_index = start
+        for index in range(start, end):
+            area = abs(
+                (point_x - avg_x) * (ys[index] - point_y)
+                - (point_x - xs[index]) * (avg_y - point_y)
+            )
+            if area > best_area:
+                best_area = area
+                best_index = index
+
+        sampled_x.append(xs[best_index])
+        sampled_y.append(ys[best_index])
+        selected = best_index
+
+    sampled_x.append(xs[-1])
+    sampled_y.append(ys[-1])
+    return sampled_x, sampled_y
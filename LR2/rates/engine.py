@@ -0,0 +1,61 @@
+"""Модуль расчёта кросс-курсов валют."""
+
+
+class RateVector:
+    """
+    Курсы выбранных валют относительно базовой валюты.
+
+    Один вектор курсов к базе заменяет таблицу попарных курсов:
+    сумма в любой валюте пересчитывается во все остальные за один проход.
+    """
+
+    def __init__(self, rates, codes):
+        """Построение вектора курсов для списка кодов валют."""
+        self.codes = list(codes)
+        self.values = [rates.get(code, 0.0) for code in self.codes]
+        self.positions = {code: index for index, code in enumerate(self.codes)}
+
+    def convert(self, code, amount):
+        """
+        Пересчёт суммы из валюты code во все валюты вектора.
+
+        Возвращает список сумм в порядке codes (None для валют без курса)
+        или None, если неизвестен курс исходной валюты.
+        """
+        source_rate = self.values[self.positions[code]]
+        if not source_rate:
+            return None
+        base_amount = amount / source_rate
+        return [base_amount * rate if rate else None for rate in self.values]
+
+
+def cross_rate(rates, source, target):
+    """Курс source -> target по таблице курсов к общей базе."""
+    source_rate = rates.get(source, 0)
+    target_rate = rates.get(target, 0)
+    if not source_rate or not target_rate:
+        return 0
+    return target_rate / source_rate
+
+
+def conversion_factors(rates, target):
+    """Множители пересчёта из каждой валюты таблицы в валюту target."""
+    target_rate = rates.get(target, 0)
+    if not target_rate:
+        return {}
+    return {code: target_rate / rate for code, rate in rates.items() if rate}
+
+
+def convert_amounts(amounts, currencies, factors):
+    """
+    Пересчёт пачки сумм по готовым множителям.
+
+    amounts и currencies - параллельные последовательности; для сумм,
+    которые не удалось разобрать (None), и неизвестных валют возвращается None.
+    """
+    get_factor = factors.get
+    result = []
+    for amount, currency in zip(amounts, currencies):
+        factor = get_factor(currency)
+        result.append(amount * factor if amount is not None and factor is not None else None)
+    return result
@@ -0,0 +1,86 @@
+"""Модуль локальной истории курсов валют."""
+
+import os
+import sqlite3
+from pathlib import Path
+
+
+HISTORY_PATH = os.environ.get(
+    'RATES_HISTORY_PATH',
+    str(Path(__file__).resolve().parent.parent / 'rates_history.db')
+)
+
+
+class RatesHistory:
+    """
+    Временной ряд снимков курсов в SQLite.
+
+    Каждый снимок - полная таблица курсов к базовой валюте с отметкой
+    времени обновления на стороне API. Новые снимки только дописываются:
+    снимок не новее последнего сохранённого пропускается.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        """Открытие (или создание) базы истории курсов."""
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS snapshots (
+                ts INTEGER PRIMARY KEY,
+                base TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rates (
+                currency TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                rate REAL NOT NULL,
+                PRIMARY KEY (currency, ts)
+            ) WITHOUT ROWID;
+        ''')
+        self.last_timestamp = self.connection.execute(
+            'SELECT MAX(ts) FROM snapshots'
+        ).fetchone()[0]
+
+    def append(self, timestamp, base, rates):
+        """Добавление снимка, если он новее последнего. Возвращает True при записи."""
+        timestamp = int(timestamp)
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+
+        with self.connection:
+            self.connection.execute(
+                'INSERT INTO snapshots (ts, base) VALUES (?, ?)', (timestamp, base)
+            )
+            self.connection.executemany(
+                'INSERT INTO rates (currency, ts, rate) VALUES (?, ?, ?)',
+                ((code, timestamp, rate) for code, rate in rates.items() if rate)
+            )
+        self.last_timestamp = timestamp
+        return True
+
+    def snapshot_count(self):
+        """Число сохранённых снимков."""
+        return self.connection.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+
+    def currencies(self):
+        """Список валют, встречающихся в истории."""
+        rows = self.connection.execute('SELECT DISTINCT currency FROM rates ORDER BY currency')
+        return [row[0] for row in rows]
+
+    def pair_series(self, source, target):
+        """Ряд курса source -> target: списки отметок времени и значений."""
+        rows = self.connection.execute('''
+            SELECT s.ts, t.rate / s.rate
+            FROM rates AS s
+            JOIN rates AS t ON t.currency = ? AND t.ts = s.ts
+            WHERE s.currency = ?
+            ORDER BY s.ts
+        ''', (target, source))
+        timestamps = []
+        values = []
+        for timestamp, value in rows:
+            timestamps.append(timestamp)
+            values.append(value)
+        return timestamps, values
+
+    def close(self):
+        """Закрытие соединения с базой истории."""
+        self.connection.close()
@@ -0,0 +1,202 @@
+"""Модуль планировщика обновления курсов валют."""
+
+import json
+import random
+import time
+
+from PyQt5.QtCore import QObject, QTimer, QUrl, pyqtSignal
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+from .api import parse_rates
+
+
+REFRESH_INTERVAL_MS = 10 * 60 * 1000
+REQUEST_TIMEOUT_MS = 10 * 1000
+BACKOFF_BASE_MS = 1000
+BACKOFF_MAX_MS = 5 * 60 * 1000
+
+
+class RatesRefresher(QObject):
+    """
+    Периодическое обновление курсов валют.
+
+    Держит не более одного запроса в работе (лишние вызовы refresh
+    объединяются с текущим), прерывает запросы по таймауту и повторяет
+    неудачные попытки с экспоненциальной задержкой и случайным разбросом.
+    """
+
+    rates_loaded = pyqtSignal(dict)
+    snapshot_loaded = pyqtSignal(int, str, dict)
+    status_changed = pyqtSignal()
+
+    def __init__(self, api_url, rates_cache, interval_ms=REFRESH_INTERVAL_MS,
+                 timeout_ms=REQUEST_TIMEOUT_MS, parent=None):
+        """Инициализация планировщика с адресом API и кэшем курсов."""
+        super().__init__(parent)
+        self.api_url = api_url
+        self.rates_cache = rates_cache
+        self.timeout_ms = timeout_ms
+        self.reply = None
+        self._stopped = False
+        self.request_started = None
+        self.retry_attempt = 0
+        self.last_error = None
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'coalesced': 0,
+            'failures': 0,
+            'not_modified': 0,
+            'last_latency_ms': None,
+            'avg_latency_ms': None,
+        }
+        self._latency_total_ms = 0.0
+        self._latency_count = 0
+
+        # Обработчик подключается один раз, а не при каждом запросе
+        self.network_manager = QNetworkAccessManager(self)
+        self.network_manager.finished.connect(self.onReplyFinished)
+
+        self.interval_timer = QTimer(self)
+        self.interval_timer.setInterval(interval_ms)
+        self.interval_timer.timeout.connect(self.refresh)
+
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.timeout.connect(self.onRequestTimeout)
+
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self.sendRequest)
+
+    def start(self):
+        """Запуск периодического обновления с немедленным первым запросом."""
+        self._stopped = False
+        self.interval_timer.start()
+        self.refresh()
+
+    def stop(self):
+        """Остановка обновления и отмена текущего запроса."""
+        self._stopped = True
+        reply = self.reply
+        if reply is not None:
+            # abort() синхронно шлёт finished; отвязанный ответ не считается ошибкой
+            # и не планирует повтор
+            self.reply = None
+            reply.abort()
+        self.interval_timer.stop()
+        self.timeout_timer.stop()
+        self.retry_timer.stop()
+
+    def setInterval(self, interval_ms):
+        """Изменение периода обновления курсов."""
+        self.interval_timer.setInterval(interval_ms)
+
+    def refresh(self):
+        """Запрос обновления; объединяется с уже идущим или ожидающим повтора."""
+        if self.reply is not None or self.retry_timer.isActive():
+            self.stats['coalesced'] += 1
+            return
+        self.sendRequest()
+
+    def sendRequest(self):
+        """Отправка условного запроса к API."""
+        if self._stopped:
+            return
+        request = QNetworkRequest(QUrl(self.api_url))
+        if self.rates_cache.rates:
+            if self.rates_cache.etag:
+                request.setRawHeader(b'If-None-Match', self.rates_cache.etag.encode())
+            if self.rates_cache.last_modified:
+                request.setRawHeader(b'If-Modified-Since', self.rates_cache.last_modified.encode())
+
+        if self.retry_attempt:
+            self.stats['retries'] += 1
+        self.stats['requests'] += 1
+        self.request_started = time.perf_counter()
+        self.reply = self.network_manager.get(request)
+        self.timeout_timer.start(self.timeout_ms)
+        self.status_changed.emit()
+
+    def onRequestTimeout(self):
+        """Прерывание зависшего запроса."""
+        if self.reply is not None:
+            self.reply.abort()
+
+    def onReplyFinished(self, reply):
+        """Обработка ответа API с курсами валют."""
+        reply.deleteLater()
+        if reply is not self.reply:
+            return
+        self.reply = None
+        self.timeout_timer.stop()
+        self._recordLatency((time.perf_counter() - self.request_started) * 1000)
+
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        if reply.error() != QNetworkReply.NoError:
+            self._scheduleRetry(reply.errorString())
+        elif status == 304:
+            self.stats['not_modified'] += 1
+            self.rates_cache.touch()
+            self._resetRetry()
+        else:
+            error = self._applyReply(reply)
+            if error is not None:
+                self._scheduleRetry(error)
+        self.status_changed.emit()
+
+    def _applyReply(self, reply):
+        """Сохранение курсов из успешного ответа. Возвращает текст ошибки или None."""
+        try:
+            data = json.loads(reply.readAll().data())
+        except ValueError as error:
+            return f"Некорректный ответ API: {error}"
+        # Ответ с ошибкой API (тоже HTTP 200) не должен затирать кэш
+        rates = parse_rates(data)
+        if rates is None:
+            return "В ответе API нет таблицы курсов"
+
+        base = data.get('base_code', 'USD')
+        self.rates_cache.update(
+            base,
+            rates,
+            self._rawHeader(reply, b'ETag'),
+            self._rawHeader(reply, b'Last-Modified')
+        )
+        self._resetRetry()
+        self.rates_loaded.emit(rates)
+        self.snapshot_loaded.emit(
+            int(data.get('time_last_update_unix') or time.time()), base, rates
+        )
+        return None
+
+    @staticmethod
+    def _rawHeader(reply, name):
+        """Значение заголовка ответа или None."""
+        if not reply.hasRawHeader(name):
+            return None
+        return bytes(reply.rawHeader(name)).decode('latin-1')
+
+    def _recordLatency(self, latency_ms):
+        """Учёт задержки выполненного запроса."""
+        self._latency_total_ms += latency_ms
+        self._latency_count += 1
+        self.stats['last_latency_ms'] = latency_ms
+        self.stats['avg_latency_ms'] = self._latency_total_ms / self._latency_count
+
+    def _resetRetry(self):
+        """Сброс счётчика попыток после успешного ответа."""
+        self.retry_attempt = 0
+        self.last_error = None
+
+    def _scheduleRetry(self, error):
+        """Планирование повтора с экспоненциальной задержкой и разбросом."""
+        if self._stopped:
+            return
+        print(f"Ошибка при загрузке курсов: {error}")
+        self.stats['failures'] += 1
+        self.last_error = error
+        delay_ms = min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** self.retry_attempt)
+        delay_ms = int(delay_ms * random.uniform(0.5, 1.5))
+        self.retry_attempt += 1
+        self.retry_timer.start(delay_ms)
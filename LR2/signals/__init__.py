@@ -4,9 +4,7 @@
 Содержит все классы сигналов для взаимодействия между компонентами.
 """
 
-from .usd_signals import UsdSignals
-from .eur_signals import EurSignals
-from .rub_signals import RubSignals
+from .currency_signals import CurrencySignals
 from .common_signals import CommonSignals
 
-__all__ = ['UsdSignals', 'EurSignals', 'RubSignals', 'CommonSignals']
+__all__ = ['CurrencySignals', 'CommonSignals']
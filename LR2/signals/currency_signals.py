@@ -0,0 +1,9 @@
+"""Модуль сигналов изменения сумм в валютах."""
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class CurrencySignals(QObject):
+    """Класс сигналов для изменений суммы в любой валюте."""
+    
+    value_changed = pyqtSignal(str, float)
@@ -0,0 +1,65 @@
+import csv
+import json
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import convert_cli
+
+
+def run(tmp_path, text):
+    rates_path = tmp_path / 'rates.json'
+    rates_path.write_text(json.dumps({
+        'base': 'USD', 'rates': {'USD': 1.0, 'EUR': 0.5}, 'fetched_at': time.time(),
+    }), encoding='utf-8')
+    input_path = tmp_path / 'input.csv'
+    input_path.write_text(text, encoding='utf-8')
+    output_path = tmp_path / 'output.csv'
+    code = convert_cli.main([str(input_path), str(output_path), '--to', 'EUR',
+                             '--rates', str(rates_path), '--chunk-size', '2'])
+    with open(output_path, newline='', encoding='utf-8') as file:
+        return code, list(csv.reader(file))
+
+
+def test_blank_lines_are_skipped(tmp_path):
+    code, rows = run(tmp_path, 'amount,currency\n10,USD\n\n5,EUR\n')
+    assert code == 0
+    assert rows == [['amount', 'currency', 'amount_EUR'],
+                    ['10', 'USD', '5.00'],
+                    ['5', 'EUR', '5.00']]
+
+
+def test_short_rows_are_left_unconverted(tmp_path, capsys):
+    code, rows = run(tmp_path, 'amount,currency,note\n10\n4,USD,x\n')
+    assert code == 0
+    assert rows[1:] == [['10', '', '', ''], ['4', 'USD', 'x', '2.00']]
+    assert 'без нужных колонок: 1' in capsys.readouterr().err
+
+
+def test_chunk_size_must_be_positive(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        convert_cli.parse_args(['in.csv', 'out.csv', '--to', 'EUR', '--chunk-size', '0'])
+    assert 'больше нуля' in capsys.readouterr().err
+
+
+def test_fetch_error_is_reported(tmp_path, monkeypatch, capsys):
+    def fail(*args, **kwargs):
+        raise urllib.error.URLError('нет сети')
+    monkeypatch.setattr(urllib.request, 'urlopen', fail)
+    code = convert_cli.main([str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'), '--to', 'EUR',
+                             '--rates', str(tmp_path / 'rates.json'), '--fetch'])
+    assert code == 1
+    assert 'Ошибка загрузки курсов' in capsys.readouterr().err
+
+
+def test_cli_does_not_import_qt():
+    code = 'import sys, convert_cli; sys.exit(any(m.startswith("PyQt5") for m in sys.modules))'
+    result = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).resolve().parent.parent)
+    assert result.returncode == 0
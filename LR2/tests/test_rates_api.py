@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rates.api import parse_rates
+
+
+def test_rates_table_is_accepted():
+    assert parse_rates({'base_code': 'USD', 'rates': {'USD': 1, 'EUR': 0.9}}) == {'USD': 1, 'EUR': 0.9}
+
+
+def test_error_bodies_are_rejected():
+    assert parse_rates({'result': 'error', 'error-type': 'quota-reached'}) is None
+    assert parse_rates({'rates': {}}) is None
+    assert parse_rates({'rates': {'EUR': 'n/a'}}) is None
+    assert parse_rates({'rates': {'EUR': True}}) is None
+    assert parse_rates(['rates']) is None
@@ -5,5 +5,6 @@
 """
 
 from .currency_converter import CurrencyConverterWidget
+from .history_chart import HistoryChartWidget
 
-__all__ = ['CurrencyConverterWidget']
+__all__ = ['CurrencyConverterWidget', 'HistoryChartWidget']
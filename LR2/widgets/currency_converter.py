@@ -1,36 +1,76 @@
 """Модуль виджета конвертера валют."""
 
-import json
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
-from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest
-from PyQt5.QtCore import QUrl
+import time
+from functools import partial
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
+                             QPushButton, QComboBox)
+from PyQt5.QtCore import QTimer
 
+from rates import RatesCache, RatesRefresher, RateVector, RatesHistory
+from rates.cache import CACHE_PATH, RATES_TTL_SECONDS
+from rates.api import API_URL
+from .history_chart import HistoryChartWidget
 
-API_URL = "http://open.er-api.com/v6/latest/USD"
+
+DEFAULT_CURRENCIES = ['USD', 'EUR', 'RUB']
+CURRENCY_NAMES = {
+    'USD': 'Доллары',
+    'EUR': 'Евро',
+    'RUB': 'Рубли',
+}
+RECOMPUTE_DELAY_MS = 25
 
 
 class CurrencyConverterWidget(QWidget):
     """
-    Главный виджет для конвертации валют между USD, EUR и RUB.
+    Главный виджет для конвертации между выбранными валютами.
     
-    Предоставляет интерфейс для конвертации между тремя валютами
-    и автоматически загружает актуальные курсы с внешнего API.
+    Предоставляет интерфейс для конвертации между любым набором валют
+    (по умолчанию USD, EUR и RUB) и автоматически загружает актуальные
+    курсы с внешнего API.
     """
     
-    def __init__(self, usd_signals, eur_signals, rub_signals, common_signals):
+    def __init__(self, currency_signals, common_signals, currencies=DEFAULT_CURRENCIES,
+                 api_url=API_URL, rates_cache=None, history=None):
         """Инициализация виджета конвертера валют."""
         super().__init__()
-        self.usd_signals = usd_signals
-        self.eur_signals = eur_signals
-        self.rub_signals = rub_signals
+        self.api_url = api_url
+        self.rates_cache = rates_cache or RatesCache(CACHE_PATH, RATES_TTL_SECONDS)
+        self.history = history or RatesHistory()
+        self.history_window = None
+        self.currency_signals = currency_signals
         self.common_signals = common_signals
+        self.currencies = []
+        self.inputs = {}
+        self.rows = {}
         self.rates = {}
-        self.updating = False
-        self.network_manager = QNetworkAccessManager()
+        self.rate_vector = RateVector({}, [])
+        self.last_edit = None
+        self.pending_edit = None
+        self.pending_keystrokes = []
+        self.edit_stats = {
+            'keystrokes': 0,
+            'recomputes': 0,
+            'last_latency_ms': None,
+            'avg_latency_ms': None,
+            'max_latency_ms': None,
+        }
+        self._latency_total_ms = 0.0
+
+        # Серия правок в пределах RECOMPUTE_DELAY_MS даёт один пересчёт
+        self.recompute_timer = QTimer(self)
+        self.recompute_timer.setSingleShot(True)
+        self.recompute_timer.setInterval(RECOMPUTE_DELAY_MS)
+        self.recompute_timer.timeout.connect(self.onRecomputeTimeout)
+
+        self.refresher = RatesRefresher(api_url, self.rates_cache, parent=self)
         
         self.initUI()
         self.setupSignals()
-        self.updateRatesFromAPI()
+        for code in currencies:
+            self.addCurrency(code)
+        self.loadCachedRates()
+        self.refresher.start()
 
     def initUI(self):
         """Инициализация компонентов интерфейса."""
@@ -38,150 +78,206 @@ class CurrencyConverterWidget(QWidget):
 
         layout = QVBoxLayout()
 
-        self.usd_label = QLabel('Доллары (USD):')
-        self.usd_input = QLineEdit()
-
-        self.eur_label = QLabel('Евро (EUR):')
-        self.eur_input = QLineEdit()
+        self.fields_layout = QVBoxLayout()
 
-        self.rub_label = QLabel('Рубли (RUB):')
-        self.rub_input = QLineEdit()
+        add_layout = QHBoxLayout()
+        self.currency_combo = QComboBox()
+        self.add_button = QPushButton('Добавить валюту')
+        add_layout.addWidget(self.currency_combo)
+        add_layout.addWidget(self.add_button)
 
         self.clear_button = QPushButton('Очистить все поля')
+        self.history_button = QPushButton('История курсов')
+        self.status_label = QLabel('Курсы не загружены')
 
-        layout.addWidget(self.usd_label)
-        layout.addWidget(self.usd_input)
-        layout.addWidget(self.eur_label)
-        layout.addWidget(self.eur_input)
-        layout.addWidget(self.rub_label)
-        layout.addWidget(self.rub_input)
+        layout.addLayout(self.fields_layout)
+        layout.addLayout(add_layout)
         layout.addWidget(self.clear_button)
+        layout.addWidget(self.history_button)
+        layout.addWidget(self.status_label)
 
         self.setLayout(layout)
 
     def setupSignals(self):
         """Подключение всех сигналов и слотов."""
-        self.usd_signals.usd_changed.connect(self.updateEurRub)
-        self.eur_signals.eur_changed.connect(self.updateUsdRub)
-        self.rub_signals.rub_changed.connect(self.updateUsdEur)
+        self.currency_signals.value_changed.connect(self.updateFields)
         
         self.common_signals.clear_all.connect(self.onClearAll)
         self.common_signals.rates_updated.connect(self.onRatesUpdated)
 
-        self.usd_input.textChanged.connect(self.onUsdChanged)
-        self.eur_input.textChanged.connect(self.onEurChanged)
-        self.rub_input.textChanged.connect(self.onRubChanged)
+        self.refresher.rates_loaded.connect(self.applyRates)
+        self.refresher.status_changed.connect(self.updateStatus)
+        self.refresher.snapshot_loaded.connect(self.onSnapshotLoaded)
 
+        self.add_button.clicked.connect(self.onAddClicked)
         self.clear_button.clicked.connect(self.onClearClicked)
+        self.history_button.clicked.connect(self.onHistoryClicked)
+
+    def addCurrency(self, code):
+        """Добавление поля ввода для валюты."""
+        if code in self.inputs:
+            return
+
+        row = QWidget()
+        row_layout = QHBoxLayout()
+        row_layout.setContentsMargins(0, 0, 0, 0)
+        label = QLabel(f'{CURRENCY_NAMES.get(code, code)} ({code}):')
+        line_edit = QLineEdit()
+        remove_button = QPushButton('✕')
+        remove_button.setFixedWidth(30)
+        row_layout.addWidget(label)
+        row_layout.addWidget(line_edit)
+        row_layout.addWidget(remove_button)
+        row.setLayout(row_layout)
+
+        # textEdited приходит только от пользователя, а не от setText,
+        # поэтому пересчёт не вызывает каскада повторных сигналов
+        line_edit.textEdited.connect(partial(self.onValueEdited, code))
+        remove_button.clicked.connect(partial(self.removeCurrency, code))
+
+        self.fields_layout.addWidget(row)
+        self.currencies.append(code)
+        self.inputs[code] = line_edit
+        self.rows[code] = row
+        self.rebuildRateVector()
+
+        if self.last_edit is not None:
+            self.updateFields(*self.last_edit)
+
+    def removeCurrency(self, code):
+        """Удаление поля ввода валюты."""
+        if code not in self.inputs:
+            return
+        self.currencies.remove(code)
+        del self.inputs[code]
+        self.rows.pop(code).deleteLater()
+        if self.last_edit is not None and self.last_edit[0] == code:
+            self.last_edit = None
+        self.rebuildRateVector()
+
+    def rebuildRateVector(self):
+        """Пересборка вектора курсов и списка доступных для добавления валют."""
+        self.rate_vector = RateVector(self.rates, self.currencies)
+
+        available = sorted(code for code in self.rates if code not in self.inputs)
+        self.currency_combo.clear()
+        self.currency_combo.addItems(available)
+        self.add_button.setEnabled(bool(available))
+
+    def loadCachedRates(self):
+        """Мгновенный старт с курсов из локального кэша."""
+        if self.rates_cache.load():
+            self.applyRates(self.rates_cache.rates)
+        self.updateStatus()
 
     def updateRatesFromAPI(self):
-        """Загрузка актуальных курсов валют с API."""
-        request = QNetworkRequest(QUrl(API_URL))
-        self.network_manager.get(request)
-        self.network_manager.finished.connect(self.onAPIResponse)
-
-    def onAPIResponse(self, reply):
-        """Обработка ответа API с курсами валют."""
-        error = reply.error()
-        if error == reply.NoError:
-            data = json.loads(reply.readAll().data())
-            rates = data.get('rates', {})
-
-            usd_to_eur = rates.get('EUR', 0)
-            usd_to_rub = rates.get('RUB', 0)
-
-            eur_to_usd = 1 / usd_to_eur if usd_to_eur else 0
-            rub_to_usd = 1 / usd_to_rub if usd_to_rub else 0
-
-            eur_to_rub = usd_to_rub / usd_to_eur if usd_to_eur else 0
-            rub_to_eur = 1 / eur_to_rub if eur_to_rub else 0
-
-            self.rates = {
-                'usd_to_eur': usd_to_eur,
-                'usd_to_rub': usd_to_rub,
-                'eur_to_usd': eur_to_usd,
-                'eur_to_rub': eur_to_rub,
-                'rub_to_usd': rub_to_usd,
-                'rub_to_eur': rub_to_eur
-            }
-            self.common_signals.rates_updated.emit(self.rates)
+        """Внеочередное обновление курсов с API."""
+        self.refresher.refresh()
+
+    def applyRates(self, rates):
+        """Передача новой таблицы курсов к базовой валюте."""
+        self.common_signals.rates_updated.emit(rates)
+
+    def updateStatus(self):
+        """Отображение времени загрузки курсов и признака устаревания."""
+        if self.rates_cache.fetched_at is None:
+            text = 'Курсы не загружены'
         else:
-            print(f"Ошибка при загрузке курсов: {reply.errorString()}")
+            fetched = time.strftime('%d.%m.%Y %H:%M', time.localtime(self.rates_cache.fetched_at))
+            text = f'Курсы от {fetched}'
+            if self.rates_cache.is_stale():
+                text += ' (устарели)'
+
+        stats = self.refresher.stats
+        text += f"\nЗапросов: {stats['requests']}, повторов: {stats['retries']}, ошибок: {stats['failures']}"
+        if stats['last_latency_ms'] is not None:
+            text += f", задержка: {stats['last_latency_ms']:.0f} мс"
+
+        edit_stats = self.edit_stats
+        if edit_stats['last_latency_ms'] is not None:
+            text += (f"\nПересчёт: {edit_stats['last_latency_ms']:.1f} мс "
+                     f"(среднее {edit_stats['avg_latency_ms']:.1f} мс, "
+                     f"нажатий {edit_stats['keystrokes']}, пересчётов {edit_stats['recomputes']})")
+        self.status_label.setText(text)
 
     def onRatesUpdated(self, new_rates):
         """Обновление внутренних курсов при получении новых данных."""
         self.rates = new_rates
+        self.rebuildRateVector()
 
-    def onUsdChanged(self, text):
-        """Обработка изменений в поле USD."""
-        if self.updating or not self.rates:
-            return
-        try:
-            value = float(text)
-        except ValueError:
-            return
-        self.usd_signals.usd_changed.emit(value)
+    def onValueEdited(self, code, text):
+        """Постановка правки поля валюты в очередь на пересчёт."""
+        self.pending_edit = (code, text)
+        self.pending_keystrokes.append(time.perf_counter())
+        self.recompute_timer.start()
 
-    def onEurChanged(self, text):
-        """Обработка изменений в поле EUR."""
-        if self.updating or not self.rates:
-            return
-        try:
-            value = float(text)
-        except ValueError:
-            return
-        self.eur_signals.eur_changed.emit(value)
+    def onRecomputeTimeout(self):
+        """Один пересчёт по последней правке из серии."""
+        code, text = self.pending_edit
+        keystrokes = self.pending_keystrokes
+        self.pending_edit = None
+        self.pending_keystrokes = []
 
-    def onRubChanged(self, text):
-        """Обработка изменений в поле RUB."""
-        if self.updating or not self.rates:
-            return
-        try:
-            value = float(text)
-        except ValueError:
-            return
-        self.rub_signals.rub_changed.emit(value)
+        if self.rates and code in self.inputs:
+            try:
+                value = float(text)
+            except ValueError:
+                pass
+            else:
+                self.currency_signals.value_changed.emit(code, value)
+        self.recordLatency(keystrokes)
 
-    def updateEurRub(self, usd_value):
-        """Обновление полей EUR и RUB на основе значения USD."""
-        if self.updating or not self.rates:
-            return
-        self.updating = True
-        eur = usd_value * self.rates['usd_to_eur']
-        rub = usd_value * self.rates['usd_to_rub']
-        self.eur_input.setText(f"{eur:.2f}")
-        self.rub_input.setText(f"{rub:.2f}")
-        self.updating = False
-
-    def updateUsdRub(self, eur_value):
-        """Обновление полей USD и RUB на основе значения EUR."""
-        if self.updating or not self.rates:
+    def recordLatency(self, keystrokes):
+        """Учёт задержки от нажатия клавиши до обновления полей."""
+        finished = time.perf_counter()
+        stats = self.edit_stats
+        latencies = [(finished - started) * 1000 for started in keystrokes]
+        stats['keystrokes'] += len(latencies)
+        stats['recomputes'] += 1
+        self._latency_total_ms += sum(latencies)
+        stats['last_latency_ms'] = latencies[-1]
+        stats['avg_latency_ms'] = self._latency_total_ms / stats['keystrokes']
+        stats['max_latency_ms'] = max(latencies + [stats['max_latency_ms'] or 0])
+        self.updateStatus()
+
+    def updateFields(self, code, value):
+        """Обновление всех полей на основе значения в валюте code."""
+        if not self.rates:
             return
-        self.updating = True
-        usd = eur_value * self.rates['eur_to_usd']
-        rub = eur_value * self.rates['eur_to_rub']
-        self.usd_input.setText(f"{usd:.2f}")
-        self.rub_input.setText(f"{rub:.2f}")
-        self.updating = False
-
-    def updateUsdEur(self, rub_value):
-        """Обновление полей USD и EUR на основе значения RUB."""
-        if self.updating or not self.rates:
+        self.last_edit = (code, value)
+        values = self.rate_vector.convert(code, value)
+        if values is None:
             return
-        self.updating = True
-        usd = rub_value * self.rates['rub_to_usd']
-        eur = rub_value * self.rates['rub_to_eur']
-        self.usd_input.setText(f"{usd:.2f}")
-        self.eur_input.setText(f"{eur:.2f}")
-        self.updating = False
+        for target, amount in zip(self.rate_vector.codes, values):
+            if target != code:
+                self.inputs[target].setText('' if amount is None else f"{amount:.2f}")
+
+    def onAddClicked(self):
+        """Обработка нажатия кнопки добавления валюты."""
+        code = self.currency_combo.currentText()
+        if code:
+            self.addCurrency(code)
 
     def onClearAll(self):
         """Очистка всех полей ввода."""
-        self.updating = True
-        self.usd_input.clear()
-        self.eur_input.clear()
-        self.rub_input.clear()
-        self.updating = False
+        self.recompute_timer.stop()
+        self.pending_edit = None
+        self.pending_keystrokes = []
+        for line_edit in self.inputs.values():
+            line_edit.clear()
+        self.last_edit = None
+
+    def onSnapshotLoaded(self, timestamp, base, rates):
+        """Дописывание нового снимка курсов в историю."""
+        if self.history.append(timestamp, base, rates) and self.history_window is not None:
+            self.history_window.refreshCurrencies()
+
+    def onHistoryClicked(self):
+        """Открытие окна с графиком истории курсов."""
+        if self.history_window is None:
+            self.history_window = HistoryChartWidget(self.history)
+        self.history_window.show()
+        self.history_window.raise_()
 
     def onClearClicked(self):
         """Обработка нажатия кнопки очистки."""
@@ -0,0 +1,156 @@
+"""Модуль виджета графика истории курсов."""
+
+import time
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
+from PyQt5.QtCore import Qt, QPointF, QRect
+
+from rates import lttb
+
+
+CHART_MARGIN = 20
+AXIS_LABEL_WIDTH = 72
+
+
+class ChartCanvas(QWidget):
+    """
+    Область рисования линейного графика.
+
+    Перед отрисовкой ряд прореживается LTTB до ширины области в пикселях,
+    поэтому время отрисовки не зависит от длины истории.
+    """
+
+    def __init__(self, parent=None):
+        """Инициализация пустого графика."""
+        super().__init__(parent)
+        self.xs = []
+        self.ys = []
+        self.sampled = None
+        self.downsample_ms = 0.0
+        self.setMinimumSize(300, 200)
+
+    def setSeries(self, xs, ys):
+        """Установка нового ряда точек."""
+        self.xs = xs
+        self.ys = ys
+        self.sampled = None
+        self.update()
+
+    def resizeEvent(self, event):
+        """Сброс прореженного ряда при изменении ширины."""
+        super().resizeEvent(event)
+        self.sampled = None
+
+    def paintEvent(self, event):
+        """Отрисовка осей и прореженного ряда."""
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+
+        plot = self.rect().adjusted(AXIS_LABEL_WIDTH, CHART_MARGIN, -CHART_MARGIN, -2 * CHART_MARGIN)
+        if len(self.xs) < 2 or plot.width() < 3:
+            painter.drawText(self.rect(), Qt.AlignCenter, 'Нет данных')
+            painter.end()
+            return
+
+        if self.sampled is None:
+            started = time.perf_counter()
+            self.sampled = lttb(self.xs, self.ys, plot.width())
+            self.downsample_ms = (time.perf_counter() - started) * 1000
+        xs, ys = self.sampled
+
+        x_min, x_max = xs[0], xs[-1]
+        y_min, y_max = min(ys), max(ys)
+        x_span = (x_max - x_min) or 1
+        y_span = (y_max - y_min) or 1
+
+        polygon = QPolygonF([
+            QPointF(
+                plot.left() + (x - x_min) / x_span * plot.width(),
+                plot.bottom() - (y - y_min) / y_span * plot.height()
+            )
+            for x, y in zip(xs, ys)
+        ])
+
+        painter.setPen(QPen(Qt.gray))
+        painter.drawRect(plot)
+        label_height = painter.fontMetrics().height()
+        painter.drawText(QRect(0, plot.top(), AXIS_LABEL_WIDTH - 4, label_height),
+                         Qt.AlignRight, f'{y_max:.4f}')
+        painter.drawText(QRect(0, plot.bottom() - label_height, AXIS_LABEL_WIDTH - 4, label_height),
+                         Qt.AlignRight, f'{y_min:.4f}')
+        axis_rect = QRect(plot.left(), plot.bottom() + 4, plot.width(), label_height)
+        painter.drawText(axis_rect, Qt.AlignLeft, self._formatTime(x_min))
+        painter.drawText(axis_rect, Qt.AlignRight, self._formatTime(x_max))
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor('#1f77b4'), 1.5))
+        painter.drawPolyline(polygon)
+        painter.end()
+
+    @staticmethod
+    def _formatTime(timestamp):
+        """Форматирование отметки времени для подписи оси."""
+        return time.strftime('%d.%m.%Y %H:%M', time.localtime(timestamp))
+
+
+class HistoryChartWidget(QWidget):
+    """Окно графика истории курса выбранной пары валют."""
+
+    def __init__(self, history, parent=None):
+        """Инициализация окна графика по базе истории курсов."""
+        super().__init__(parent)
+        self.history = history
+        self.initUI()
+        self.refreshCurrencies()
+
+    def initUI(self):
+        """Инициализация компонентов интерфейса."""
+        self.setWindowTitle('История курсов')
+        self.resize(800, 400)
+
+        layout = QVBoxLayout()
+        controls_layout = QHBoxLayout()
+
+        self.source_combo = QComboBox()
+        self.target_combo = QComboBox()
+        self.info_label = QLabel()
+        controls_layout.addWidget(self.source_combo)
+        controls_layout.addWidget(QLabel('→'))
+        controls_layout.addWidget(self.target_combo)
+        controls_layout.addWidget(self.info_label, 1)
+
+        self.canvas = ChartCanvas()
+
+        layout.addLayout(controls_layout)
+        layout.addWidget(self.canvas, 1)
+        self.setLayout(layout)
+
+        self.source_combo.currentTextChanged.connect(self.onPairChanged)
+        self.target_combo.currentTextChanged.connect(self.onPairChanged)
+
+    def refreshCurrencies(self):
+        """Заполнение списков валют из истории с сохранением выбора."""
+        source = self.source_combo.currentText() or 'USD'
+        target = self.target_combo.currentText() or 'EUR'
+        currencies = self.history.currencies()
+
+        for combo, selected in ((self.source_combo, source), (self.target_combo, target)):
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItems(currencies)
+            if selected in currencies:
+                combo.setCurrentText(selected)
+            combo.blockSignals(False)
+        self.onPairChanged()
+
+    def onPairChanged(self):
+        """Загрузка ряда для выбранной пары валют."""
+        source = self.source_combo.currentText()
+        target = self.target_combo.currentText()
+        if not source or not target:
+            self.canvas.setSeries([], [])
+            self.info_label.setText('')
+            return
+        xs, ys = self.history.pair_series(source, target)
+        self.canvas.setSeries(xs, ys)
+        self.info_label.setText(f'Снимков: {len(xs)}')
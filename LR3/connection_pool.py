@@ -0,0 +1,103 @@
+import os
+import queue
+import sqlite3
+import threading
+from urllib.parse import quote
+
+
+# Число соединений только для чтения, которые могут работать одновременно
+# (вкладка с недочитанным результатом держит своё соединение)
+READ_POOL_SIZE = 8
+# Размер кэша страниц каждого соединения, КиБ (PRAGMA cache_size с минусом)
+CACHE_SIZE_KIB = 16 * 1024
+# Сколько байт файла базы отображать в память (0 - не использовать mmap)
+MMAP_SIZE = 256 * 1024 * 1024
+# Сколько подготовленных запросов хранит каждое соединение
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """Одно соединение для записи и пул соединений только для чтения в режиме WAL"""
+
+    def __init__(self, db_name, readers=READ_POOL_SIZE, cache_size_kib=CACHE_SIZE_KIB,
+                 mmap_size=MMAP_SIZE, cached_statements=STATEMENT_CACHE_SIZE):
+        self.db_name = db_name
+        self.readers = readers
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+        # В режиме WAL читатели не ждут писателя и друг друга
+        self.writer = sqlite3.connect(db_name, cached_statements=cached_statements)
+        self.writer.execute('PRAGMA journal_mode=WAL')
+        self.writer.execute('PRAGMA synchronous=NORMAL')
+        self.configure(self.writer)
+
+    def configure(self, connection):
+        connection.execute(f'PRAGMA cache_size=-{int(self.cache_size_kib)}')
+        connection.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+
+    def open_reader(self):
+        """Открыть отдельное соединение только для чтения, не входящее в пул"""
+        uri = 'file:' + quote(os.path.abspath(self.db_name)) + '?mode=ro'
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                     cached_statements=self.cached_statements)
+        self.configure(connection)
+        return connection
+
+    def acquire(self, timeout=None):
+        """Взять соединение для чтения; None, если за timeout оно не освободилось"""
+        with self.lock:
+            if self.closed:
+                raise sqlite3.ProgrammingError('Пул соединений закрыт')
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            # Соединения открываются по мере надобности, но не больше readers
+            if self.opened < self.readers:
+                self.opened += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self.open_reader()
+            except sqlite3.Error:
+                with self.lock:
+                    self.opened -= 1
+                raise
+        try:
+            return self.idle.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def release(self, connection):
+        """Вернуть соединение в пул"""
+        connection.set_progress_handler(None, 0)
+        if connection.in_transaction:
+            connection.rollback()
+        with self.lock:
+            if not self.closed:
+                self.idle.put(connection)
+                return
+            self.opened -= 1
+        connection.close()
+
+    def close(self):
+        """Закрыть свободные соединения; занятые закрываются при возврате"""
+        with self.lock:
+            self.closed = True
+            while True:
+                try:
+                    connection = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+                self.opened -= 1
+                connection.close()
+        self.writer.close()
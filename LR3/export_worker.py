@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from exporter import ExportCancelled, export_query
+from query_worker import ACQUIRE_TIMEOUT, PROGRESS_HANDLER_STEPS
+
+
+class ExportWorker(QThread):
+    """Поток, заново выполняющий запрос вкладки и выгружающий результат в файл"""
+
+    progress = pyqtSignal(int, float)
+    exported = pyqtSignal(dict)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, pool, query, params, path, file_format=None, parent=None):
+        super().__init__(parent)
+        self.pool = pool
+        self.query = query
+        self.params = params
+        self.path = path
+        self.file_format = file_format
+        self.connection = None
+        self.cancel_requested = False
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        """Прервать экспорт"""
+        with self.lock:
+            self.cancel_requested = True
+            if self.connection is not None:
+                self.connection.interrupt()
+
+    def run(self):
+        connection = None
+        try:
+            while connection is None:
+                if self.cancel_requested:
+                    self.cancelled.emit()
+                    return
+                connection = self.pool.acquire(timeout=ACQUIRE_TIMEOUT)
+            with self.lock:
+                self.connection = connection
+            connection.set_progress_handler(
+                lambda: 1 if self.cancel_requested else 0, PROGRESS_HANDLER_STEPS
+            )
+            stats = export_query(
+                connection, self.query, self.path, self.file_format, params=self.params,
+                progress=self.progress.emit,
+                should_stop=lambda: self.cancel_requested,
+            )
+        except ExportCancelled:
+            self.cancelled.emit()
+        except (OSError, ValueError, sqlite3.Error) as e:
+            if self.cancel_requested:
+                self.cancelled.emit()
+            else:
+                self.failed.emit(str(e))
+        else:
+            self.exported.emit(stats)
+        finally:
+            with self.lock:
+                self.connection = None
+            if connection is not None:
+                self.pool.release(connection)
@@ -0,0 +1,85 @@
+"""
+Потоковый экспорт результата запроса в CSV или JSONL.
+
+Запрос выполняется заново, строки читаются из курсора порциями и сразу
+пишутся в файл, поэтому расход памяти не зависит от размера результата.
+Файл пишется во временный и переименовывается только после успешного
+завершения, так что прерванный экспорт не оставляет обрезанного файла.
+"""
+
+import csv
+import json
+import os
+import time
+
+from importer import FORMATS, detect_format
+
+
+CHUNK_SIZE = 10000
+
+
+class ExportCancelled(Exception):
+    """Экспорт прерван пользователем"""
+
+
+def json_default(value):
+    # BLOB-значения в JSON записываются шестнадцатеричной строкой
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f'Значение типа {type(value).__name__} не сериализуется в JSON')
+
+
+def export_query(connection, query, path, file_format=None, chunk_size=CHUNK_SIZE,
+                 progress=None, should_stop=None, params=()):
+    """
+    Выполнить запрос и записать результат в файл.
+
+    progress(rows, elapsed) вызывается после каждой порции, should_stop()
+    прерывает экспорт (исключение ExportCancelled). Возвращает статистику.
+    """
+    file_format = file_format or detect_format(path)
+    if file_format not in FORMATS:
+        raise ValueError(f'Неизвестный формат: {file_format}')
+
+    started = time.perf_counter()
+    temp_path = path + '.tmp'
+    cursor = connection.execute(query, params)
+    try:
+        columns = [column[0] for column in cursor.description or []]
+        total_rows = 0
+        with open(temp_path, 'w', newline='', encoding='utf-8') as file:
+            if file_format == 'csv':
+                writer = csv.writer(file)
+                writer.writerow(columns)
+                write_rows = writer.writerows
+            else:
+                dumps = json.JSONEncoder(ensure_ascii=False, default=json_default).encode
+
+                def write_rows(rows):
+                    file.writelines(dumps(dict(zip(columns, row))) + '\n' for row in rows)
+
+            while True:
+                if should_stop is not None and should_stop():
+                    raise ExportCancelled()
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                write_rows(rows)
+                total_rows += len(rows)
+                if progress is not None:
+                    progress(total_rows, time.perf_counter() - started)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'path': path,
+        'rows': total_rows,
+        'seconds': elapsed,
+        'rows_per_second': total_rows / elapsed if elapsed > 0 else 0,
+    }
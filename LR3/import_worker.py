@@ -0,0 +1,36 @@
+import sqlite3
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from importer import import_file
+
+
+class ImportWorker(QThread):
+    """Поток, загружающий файл в базу без блокировки интерфейса"""
+
+    progress = pyqtSignal(int, float)
+    imported = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_name, path, table, parent=None):
+        super().__init__(parent)
+        self.db_name = db_name
+        self.path = path
+        self.table = table
+        self.cancel_requested = False
+
+    def cancel(self):
+        """Остановить загрузку после текущей пачки"""
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            stats = import_file(
+                self.db_name, self.path, self.table,
+                progress=self.progress.emit,
+                should_stop=lambda: self.cancel_requested,
+            )
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self.failed.emit(str(e))
+        else:
+            self.imported.emit(stats)
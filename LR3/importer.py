@@ -0,0 +1,333 @@
+"""
+Потоковый импорт CSV и JSONL в базу SQLite.
+
+Файл читается построчно, типы колонок определяются по первым строкам,
+строки вставляются большими пачками executemany. Вся загрузка - одна
+транзакция: при ошибке или отмене таблица остаётся прежней. Индексы
+строятся после загрузки данных.
+
+Пример:
+    python importer.py dump.csv --table events --index user_id --index created_at
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from itertools import chain, islice
+
+
+BATCH_SIZE = 50000
+SAMPLE_SIZE = 1000
+# Режим синхронизации на время загрузки: OFF быстрее всего, но не переживает сбой питания
+SYNCHRONOUS = 'OFF'
+# Кэш страниц на время загрузки и построения индексов, КиБ
+IMPORT_CACHE_SIZE_KIB = 64 * 1024
+PROGRESS_INTERVAL_SECONDS = 2.0
+FORMATS = ('csv', 'jsonl')
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+
+
+def quote_identifier(name):
+    """Имя таблицы или колонки в кавычках для подстановки в SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def detect_format(path):
+    """Формат по расширению файла"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+
+def value_type(value):
+    """Тип SQLite для одного значения; None для пустого значения"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return 'INTEGER'
+    if isinstance(value, int):
+        return 'INTEGER'
+    if isinstance(value, float):
+        return 'REAL'
+    if isinstance(value, str):
+        try:
+            int(value)
+            return 'INTEGER'
+        except ValueError:
+            pass
+        try:
+            float(value)
+            return 'REAL'
+        except ValueError:
+            pass
+    return 'TEXT'
+
+
+def infer_types(columns, sample):
+    """Типы колонок по выборке строк: INTEGER, REAL или TEXT"""
+    types = []
+    for index in range(len(columns)):
+        seen = {value_type(row[index]) for row in sample if index < len(row)}
+        seen.discard(None)
+        if not seen or 'TEXT' in seen:
+            types.append('TEXT')
+        elif 'REAL' in seen:
+            types.append('REAL')
+        else:
+            types.append('INTEGER')
+    return types
+
+
+def make_converter(column_type):
+    """Преобразование строкового значения CSV к типу колонки"""
+    if column_type == 'TEXT':
+        return None
+    cast = int if column_type == 'INTEGER' else float
+
+    def convert(value):
+        if value is None or value == '':
+            return None
+        try:
+            return cast(value)
+        except ValueError:
+            # Выборка могла не встретить такое значение: храним как есть
+            return value
+    return convert
+
+
+def read_csv(file, delimiter=',', counts=None):
+    """
+    Заголовок и итератор строк CSV ровно по числу колонок.
+
+    Пустые строки пропускаются, в коротких недостающие значения - NULL,
+    лишние значения отбрасываются; counts считает такие строки.
+    """
+    reader = csv.reader(file, delimiter=delimiter)
+    columns = next(reader, None)
+    if columns is None:
+        raise ValueError('Пустой файл')
+    if counts is None:
+        counts = {}
+    counts.setdefault('blank_rows', 0)
+    counts.setdefault('uneven_rows', 0)
+    width = len(columns)
+
+    def rows():
+        for row in reader:
+            if not row:
+                counts['blank_rows'] += 1
+                continue
+            if len(row) != width:
+                counts['uneven_rows'] += 1
+                row = row[:width] if len(row) > width else row + [None] * (width - len(row))
+            yield row
+
+    return columns, rows()
+
+
+def read_jsonl(file, sample_size):
+    """Колонки (по ключам объектов выборки) и итератор строк JSONL"""
+    def objects():
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f'Строка {line_number}: {e}') from None
+            if not isinstance(obj, dict):
+                raise ValueError(f'Строка {line_number}: ожидался объект')
+            yield obj
+
+    stream = objects()
+    sample = list(islice(stream, sample_size))
+    columns = []
+    for obj in sample:
+        for key in obj:
+            if key not in columns:
+                columns.append(key)
+    if not columns:
+        raise ValueError('Пустой файл')
+
+    def to_row(obj):
+        row = []
+        for key in columns:
+            value = obj.get(key)
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False)
+            row.append(value)
+        return row
+
+    return columns, (to_row(obj) for obj in chain(sample, stream))
+
+
+def import_file(db_name, path, table, file_format=None, delimiter=',', batch_size=BATCH_SIZE,
+                sample_size=SAMPLE_SIZE, synchronous=SYNCHRONOUS, journal_mode=None,
+                indexes=(), progress=None, should_stop=None):
+    """
+    Загрузить CSV или JSONL в таблицу table (создаётся при отсутствии).
+
+    progress(rows, elapsed) вызывается после каждой пачки, should_stop()
+    прерывает загрузку между пачками; прерванная загрузка откатывается.
+    Возвращает статистику загрузки.
+    """
+    file_format = file_format or detect_format(path)
+    if file_format not in FORMATS:
+        raise ValueError(f'Неизвестный формат: {file_format}')
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f'Недопустимый режим synchronous: {synchronous}')
+    if journal_mode and journal_mode not in JOURNAL_MODES:
+        raise ValueError(f'Недопустимый режим журнала: {journal_mode}')
+
+    started = time.perf_counter()
+    # Транзакцией управляем сами: BEGIN в начале, COMMIT или ROLLBACK в конце
+    connection = sqlite3.connect(db_name, timeout=30, isolation_level=None)
+    file = open(path, newline='', encoding='utf-8')
+    counts = {'blank_rows': 0, 'uneven_rows': 0}
+    try:
+        connection.execute(f'PRAGMA synchronous={synchronous}')
+        connection.execute(f'PRAGMA cache_size=-{IMPORT_CACHE_SIZE_KIB}')
+        if journal_mode:
+            connection.execute(f'PRAGMA journal_mode={journal_mode}')
+
+        if file_format == 'csv':
+            columns, rows = read_csv(file, delimiter, counts)
+            sample = list(islice(rows, sample_size))
+            types = infer_types(columns, sample)
+            converters = [make_converter(column_type) for column_type in types]
+            rows = chain(sample, rows)
+            if any(converters):
+                rows = (
+                    [convert(value) if convert else value for convert, value in zip(converters, row)]
+                    for row in rows
+                )
+        else:
+            columns, rows = read_jsonl(file, sample_size)
+            rows = iter(rows)
+            sample = list(islice(rows, sample_size))
+            types = infer_types(columns, sample)
+            rows = chain(sample, rows)
+
+        for column in indexes:
+            if column not in columns:
+                raise ValueError(f'Нет колонки для индекса: {column}')
+
+        # Вся загрузка - одна транзакция: ошибка в середине файла не оставит
+        # половину данных (при synchronous=OFF тем более)
+        connection.execute('BEGIN IMMEDIATE')
+        table_sql = quote_identifier(table)
+        definitions = ', '.join(
+            f'{quote_identifier(column)} {column_type}' for column, column_type in zip(columns, types)
+        )
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {table_sql} ({definitions})')
+
+        insert_sql = (
+            f'INSERT INTO {table_sql} ({", ".join(quote_identifier(column) for column in columns)}) '
+            f'VALUES ({", ".join("?" * len(columns))})'
+        )
+        total_rows = 0
+        cancelled = False
+        while True:
+            if should_stop is not None and should_stop():
+                cancelled = True
+                break
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            connection.executemany(insert_sql, batch)
+            total_rows += len(batch)
+            if progress is not None:
+                progress(total_rows, time.perf_counter() - started)
+
+        load_seconds = time.perf_counter() - started
+        if cancelled:
+            connection.execute('ROLLBACK')
+            total_rows = 0
+        else:
+            # Индексы дешевле построить один раз по готовым данным, чем обновлять при каждой вставке
+            for column in indexes:
+                index_name = quote_identifier(f'idx_{table}_{column}')
+                connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS {index_name} ON {table_sql} ({quote_identifier(column)})'
+                )
+            connection.execute('COMMIT')
+    finally:
+        if connection.in_transaction:
+            connection.rollback()
+        file.close()
+        connection.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'table': table,
+        'columns': dict(zip(columns, types)),
+        'rows': total_rows,
+        'blank_rows': counts['blank_rows'],
+        'uneven_rows': counts['uneven_rows'],
+        'cancelled': cancelled,
+        'load_seconds': load_seconds,
+        'index_seconds': elapsed - load_seconds,
+        'seconds': elapsed,
+        'rows_per_second': total_rows / load_seconds if load_seconds > 0 else 0,
+    }
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description='Потоковый импорт CSV/JSONL в SQLite.')
+    parser.add_argument('input', help='входной файл CSV или JSONL')
+    parser.add_argument('--db', default='database.db', help='файл базы данных')
+    parser.add_argument('--table', help='имя таблицы (по умолчанию - имя файла)')
+    parser.add_argument('--format', choices=FORMATS, help='формат файла (по умолчанию - по расширению)')
+    parser.add_argument('--delimiter', default=',', help='разделитель CSV')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='число строк в одной пачке executemany')
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE,
+                        help='число строк для определения типов колонок')
+    parser.add_argument('--synchronous', default=SYNCHRONOUS,
+                        choices=SYNCHRONOUS_MODES,
+                        help='PRAGMA synchronous на время загрузки')
+    parser.add_argument('--journal-mode', choices=JOURNAL_MODES,
+                        help='PRAGMA journal_mode (по умолчанию не меняется)')
+    parser.add_argument('--index', action='append', default=[],
+                        help='колонка, по которой построить индекс после загрузки')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Точка входа консольного импорта"""
+    args = parse_args(argv)
+    table = args.table or os.path.splitext(os.path.basename(args.input))[0]
+    last_report = [0.0]
+
+    def report(rows, elapsed):
+        if elapsed - last_report[0] >= PROGRESS_INTERVAL_SECONDS:
+            last_report[0] = elapsed
+            print(f'{rows} строк, {rows / elapsed:.0f} строк/с', file=sys.stderr)
+
+    try:
+        stats = import_file(args.db, args.input, table, args.format, args.delimiter,
+                            args.batch_size, args.sample_size, args.synchronous,
+                            args.journal_mode, args.index, report)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f'Ошибка импорта: {e}', file=sys.stderr)
+        return 1
+
+    print(f"Готово: {stats['rows']} строк в {stats['table']} за {stats['seconds']:.2f} с "
+          f"({stats['rows_per_second']:.0f} строк/с, индексы {stats['index_seconds']:.2f} с)",
+          file=sys.stderr)
+    if stats['blank_rows'] or stats['uneven_rows']:
+        print(f"Пропущено пустых строк: {stats['blank_rows']}, строк с другим числом значений "
+              f"(дополнены NULL или обрезаны): {stats['uneven_rows']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import re
+import sqlite3
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from importer import quote_identifier
+
+
+# Простой запрос к одной таблице: SELECT ... FROM table без условий и соединений
+SIMPLE_SELECT_RE = re.compile(
+    r'^\s*select\s+.+?\s+from\s+("(?:[^"]|"")+"|\w+)\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def source_table(query):
+    """Таблица, из которой читает простой запрос, или None"""
+    match = SIMPLE_SELECT_RE.match(query)
+    if match is None:
+        return None
+    name = match.group(1)
+    if name.startswith('"'):
+        name = name[1:-1].replace('""', '"')
+    return name
+
+
+def index_name(table, column):
+    """Имя индекса, который создаёт приложение"""
+    return f'idx_{table}_{column}'
+
+
+def leading_index_columns(schema, table):
+    """
+    Колонки таблицы и те из них, с которых начинается какой-либо индекс
+    (включая rowid-ключ INTEGER PRIMARY KEY), по кэшу схемы
+    """
+    columns = set()
+    rowid = schema.rowid_column(table)
+    if rowid is not None:
+        columns.add(rowid)
+    for index_columns in schema.indexes(table).values():
+        if index_columns and index_columns[0] is not None:
+            columns.add(index_columns[0])
+    return set(schema.columns(table)), columns
+
+
+def missing_indexes(schema, query, columns):
+    """Таблица простого запроса и колонки из columns, по которым у неё нет индекса"""
+    table = source_table(query)
+    if table is None or table.lower().startswith('sqlite_'):
+        return None, []
+    table = schema.find_table(table)
+    if table is None:
+        return None, []
+    table_columns, indexed = leading_index_columns(schema, table)
+    # Колонки-псевдонимы из запроса (SELECT x AS y) индексировать нельзя
+    return table, [column for column in columns
+                   if column in table_columns and column not in indexed]
+
+
+class IndexWorker(QThread):
+    """Поток, строящий индексы, чтобы не блокировать интерфейс на больших таблицах"""
+
+    created = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_name, table, columns, parent=None):
+        super().__init__(parent)
+        self.db_name = db_name
+        self.table = table
+        self.columns = columns
+
+    def run(self):
+        created = []
+        try:
+            connection = sqlite3.connect(self.db_name, timeout=30)
+            try:
+                for column in self.columns:
+                    name = index_name(self.table, column)
+                    connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS {quote_identifier(name)} '
+                        f'ON {quote_identifier(self.table)} ({quote_identifier(column)})'
+                    )
+                    created.append(name)
+                connection.commit()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            self.failed.emit(str(e))
+        else:
+            self.created.emit(created)
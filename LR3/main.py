@@ -1,25 +1,48 @@
 import sys
 import sqlite3
+import os
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QComboBox, QTabWidget,
-                             QTableView, QMessageBox, QMenuBar, QMenu)
+                             QMessageBox, QMenuBar, QMenu, QFileDialog, QInputDialog)
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QStandardItemModel, QStandardItem, QAction
+from PyQt6.QtGui import QAction
+
+from connection_pool import ConnectionPool
+from import_worker import ImportWorker
+from profiler_tab import ProfilerTab
+from query_builder import QueryBuilder
+from schema_cache import SchemaCache
+from query_tab import QueryTab
+from result_cache import ResultCache
+
+
+# Сколько памяти отводится под кэш результатов запросов
+RESULT_CACHE_BUDGET_BYTES = 64 * 1024 * 1024
 
 
 class DatabaseManager:
     """Класс для управления подключением и запросами к SQLite БД"""
     
     def __init__(self):
+        self.db_name = None
+        self.pool = None
         self.connection = None
         self.cursor = None
+        self.schema = None
+        self.builder = None
     
     def connect(self, db_name='database.db'):
         """Установить соединение с БД"""
         try:
-            self.connection = sqlite3.connect(db_name)
+            self.db_name = db_name
+            # Запись идёт через одно соединение, запросы вкладок - через пул читателей
+            self.pool = ConnectionPool(db_name)
+            self.connection = self.pool.writer
             self.cursor = self.connection.cursor()
             self.create_test_data()
+            # Схема читается один раз и перечитывается только при её изменении
+            self.schema = SchemaCache(self.connection)
+            self.builder = QueryBuilder(self.schema)
             return True
         except sqlite3.Error as e:
             print(f"Ошибка подключения к БД: {e}")
@@ -84,33 +107,42 @@ class DatabaseManager:
         except sqlite3.Error as e:
             print(f"Ошибка создания тестовых данных: {e}")
     
-    def execute_query(self, query):
-        """Выполнить SQL запрос и вернуть результаты"""
+    def open_connection(self):
+        """Открыть отдельное соединение только для чтения вне пула"""
+        return self.pool.open_reader()
+    
+    def refresh_schema(self):
+        """Перечитать кэш схемы, если схема изменилась; вызывается раз на действие пользователя"""
         try:
-            self.cursor.execute(query)
-            columns = [description[0] for description in self.cursor.description]
-            rows = self.cursor.fetchall()
-            return columns, rows
+            self.schema.check()
         except sqlite3.Error as e:
-            print(f"Ошибка выполнения запроса: {e}")
-            return None, None
+            print(f"Ошибка чтения схемы: {e}")
+    
+    def get_table_names(self):
+        """Получить имена таблиц из кэша схемы"""
+        try:
+            return self.schema.tables()
+        except sqlite3.Error as e:
+            print(f"Ошибка получения таблиц: {e}")
+            return []
     
     def get_column_names(self, table_name):
-        """Получить имена колонок из таблицы"""
+        """Получить имена колонок таблицы из кэша схемы"""
         try:
-            self.cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = [row[1] for row in self.cursor.fetchall()]
-            return columns
+            return self.schema.columns(table_name)
         except sqlite3.Error as e:
             print(f"Ошибка получения колонок: {e}")
             return []
     
     def close(self):
         """Закрыть соединение с БД"""
-        if self.connection:
-            self.connection.close()
+        if self.pool:
+            self.pool.close()
+            self.pool = None
             self.connection = None
             self.cursor = None
+            self.schema = None
+            self.builder = None
 
 
 class MainWindow(QMainWindow):
@@ -119,6 +151,8 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.db_manager = DatabaseManager()
+        self.result_cache = ResultCache(RESULT_CACHE_BUDGET_BYTES)
+        self.import_worker = None
         self.is_connected = False
         self.init_ui()
     
@@ -147,6 +181,12 @@ class MainWindow(QMainWindow):
         self.bt1.setEnabled(False)
         controls_layout.addWidget(self.bt1)
         
+        # Выбор таблицы для списка колонок
+        self.table_combo = QComboBox()
+        self.table_combo.currentTextChanged.connect(self.on_table_changed)
+        self.table_combo.setEnabled(False)
+        controls_layout.addWidget(self.table_combo)
+        
         # QComboBox
         self.combo_box = QComboBox()
         self.combo_box.addItem('QComboBox "Colums"')
@@ -179,6 +219,9 @@ class MainWindow(QMainWindow):
         
         # Словарь для хранения вкладок
         self.tabs = {}
+        
+        # Профилировщик запросов (вкладка Profiler)
+        self.profiler_tab = ProfilerTab()
     
     def create_menu(self):
         """Создание меню"""
@@ -196,6 +239,11 @@ class MainWindow(QMainWindow):
         close_connection_action = QAction('Close connection', self)
         close_connection_action.triggered.connect(self.close_connection)
         menu.addAction(close_connection_action)
+        
+        # Import data
+        import_action = QAction('Import data...', self)
+        import_action.triggered.connect(self.import_data)
+        menu.addAction(import_action)
     
     def set_connection(self):
         """Установить соединение с БД"""
@@ -205,22 +253,22 @@ class MainWindow(QMainWindow):
         
         if self.db_manager.connect():
             self.is_connected = True
+            # Кэш результатов сбрасывается, когда базу меняет любое другое соединение
+            self.result_cache.attach(self.db_manager.open_connection())
             
             # Активировать кнопки
             self.bt1.setEnabled(True)
             self.bt2.setEnabled(True)
             self.bt3.setEnabled(True)
             self.combo_box.setEnabled(True)
+            self.table_combo.setEnabled(True)
             
-            # Заполнить ComboBox колонками из таблицы users
-            columns = self.db_manager.get_column_names('users')
-            self.combo_box.clear()
-            self.combo_box.addItem('QComboBox "Colums"')
-            for column in columns:
-                self.combo_box.addItem(column)
+            # Заполнить списки таблиц и колонок (по умолчанию - таблица users)
+            self.populate_tables('users')
             
             # Выполнить запрос для Tab1
             self.create_tab('Tab1', 'SELECT * FROM sqlite_master')
+            self.tab_widget.addTab(self.profiler_tab, 'Profiler')
             
             QMessageBox.information(self, 'Успех', 'Соединение с БД установлено')
         else:
@@ -232,7 +280,10 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, 'Информация', 'Соединение не установлено')
             return
         
-        # Закрыть соединение
+        # Остановить импорт и запросы вкладок и закрыть соединение
+        self.stop_import()
+        self.stop_tabs()
+        self.result_cache.detach()
         self.db_manager.close()
         self.is_connected = False
         
@@ -241,47 +292,168 @@ class MainWindow(QMainWindow):
         self.bt2.setEnabled(False)
         self.bt3.setEnabled(False)
         self.combo_box.setEnabled(False)
+        self.table_combo.setEnabled(False)
         
         # Очистить все вкладки
         self.tab_widget.clear()
         self.tabs.clear()
         
         # Очистить ComboBox
+        self.table_combo.blockSignals(True)
+        self.table_combo.clear()
+        self.table_combo.blockSignals(False)
         self.combo_box.clear()
         self.combo_box.addItem('QComboBox "Colums"')
         
         QMessageBox.information(self, 'Успех', 'Соединение с БД закрыто')
     
-    def create_tab(self, tab_name, query):
+    def populate_tables(self, current=None):
+        """Заполнить список таблиц из кэша схемы, сохранив выбранную таблицу"""
+        current = current or self.table_combo.currentText()
+        self.db_manager.refresh_schema()
+        tables = self.db_manager.get_table_names()
+        self.table_combo.blockSignals(True)
+        self.table_combo.clear()
+        self.table_combo.addItems(tables)
+        if current in tables:
+            self.table_combo.setCurrentText(current)
+        self.table_combo.blockSignals(False)
+        self.populate_columns(self.table_combo.currentText())
+    
+    def on_table_changed(self, table):
+        """Выбрана другая таблица"""
+        self.db_manager.refresh_schema()
+        self.populate_columns(table)
+    
+    def populate_columns(self, table):
+        """Заполнить ComboBox колонками таблицы из кэша схемы"""
+        self.combo_box.blockSignals(True)
+        self.combo_box.clear()
+        self.combo_box.addItem('QComboBox "Colums"')
+        if table:
+            self.combo_box.addItems(self.db_manager.get_column_names(table))
+        self.combo_box.blockSignals(False)
+    
+    def create_tab(self, tab_name, query, params=()):
         """Создать или обновить вкладку с результатами запроса"""
-        columns, rows = self.db_manager.execute_query(query)
-        
-        if columns is None or rows is None:
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка выполнения запроса для {tab_name}')
-            return
-        
-        # Создать модель для таблицы
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(columns)
-        
-        # Заполнить модель данными
-        for row in rows:
-            items = [QStandardItem(str(cell)) for cell in row]
-            model.appendRow(items)
-        
-        # Создать или обновить вкладку
         if tab_name in self.tabs:
             # Обновить существующую вкладку
-            table_view = self.tabs[tab_name]
-            table_view.setModel(model)
+            tab = self.tabs[tab_name]
         else:
             # Создать новую вкладку
-            table_view = QTableView()
-            table_view.setModel(model)
-            table_view.resizeColumnsToContents()
-            
-            self.tab_widget.addTab(table_view, tab_name)
-            self.tabs[tab_name] = table_view
+            tab = QueryTab(self.db_manager.pool, self.result_cache, self.db_manager.schema)
+            tab.failed.connect(
+                lambda message, name=tab_name: QMessageBox.critical(
+                    self, 'Ошибка', f'Ошибка выполнения запроса для {name}: {message}'
+                )
+            )
+            tab.cache_used.connect(self.show_cache_stats)
+            tab.profiled.connect(
+                lambda profile, name=tab_name: self.profiler_tab.record(name, profile)
+            )
+            tab.export_requested.connect(lambda tab=tab: self.export_tab(tab))
+            self.tab_widget.addTab(tab, tab_name)
+            self.tabs[tab_name] = tab
+        
+        # Запрос выполняется в отдельном потоке на соединении из пула,
+        # поэтому вкладки не ждут друг друга
+        tab.run_query(query, params)
+    
+    def show_cache_stats(self):
+        """Показать статистику кэша результатов в строке состояния"""
+        stats = self.result_cache.stats
+        self.statusBar().showMessage(
+            f"Кэш: попаданий {stats['hits']}, промахов {stats['misses']}, "
+            f"записей {len(self.result_cache.entries)}, "
+            f"{self.result_cache.size_bytes / 1024:.0f} КБ"
+        )
+    
+    def stop_tabs(self):
+        """Остановить запросы и экспорт всех вкладок"""
+        for tab in self.tabs.values():
+            tab.shutdown()
+    
+    def export_tab(self, tab):
+        """Выгрузить результат запроса вкладки в CSV или JSONL"""
+        if not self.is_connected:
+            return
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, 'Экспорт результата', '', 'CSV (*.csv);;JSONL (*.jsonl)'
+        )
+        if not path:
+            return
+        file_format = 'jsonl' if selected_filter.startswith('JSONL') else 'csv'
+        if not os.path.splitext(path)[1]:
+            path += '.' + file_format
+        tab.start_export(path, file_format)
+    
+    def closeEvent(self, event):
+        self.stop_import()
+        self.stop_tabs()
+        super().closeEvent(event)
+    
+    def import_data(self):
+        """Загрузить CSV или JSONL в базу в фоновом потоке"""
+        if not self.is_connected:
+            QMessageBox.information(self, 'Информация', 'Соединение не установлено')
+            return
+        if self.import_worker is not None:
+            QMessageBox.information(self, 'Информация', 'Импорт уже выполняется')
+            return
+        
+        path, _ = QFileDialog.getOpenFileName(
+            self, 'Импорт данных', '', 'CSV / JSONL (*.csv *.jsonl *.ndjson);;Все файлы (*)'
+        )
+        if not path:
+            return
+        default_table = os.path.splitext(os.path.basename(path))[0]
+        table, ok = QInputDialog.getText(self, 'Импорт данных', 'Таблица:', text=default_table)
+        if not ok or not table:
+            return
+        
+        worker = ImportWorker(self.db_manager.db_name, path, table, self)
+        worker.progress.connect(self.on_import_progress)
+        worker.imported.connect(self.on_imported)
+        worker.failed.connect(self.on_import_failed)
+        worker.finished.connect(self.on_import_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.import_worker = worker
+        self.statusBar().showMessage(f'Импорт {os.path.basename(path)} в {table}...')
+        worker.start()
+    
+    def stop_import(self):
+        """Прервать импорт и дождаться завершения потока"""
+        worker, self.import_worker = self.import_worker, None
+        if worker is not None:
+            worker.cancel()
+            worker.wait()
+    
+    def on_import_progress(self, rows, elapsed):
+        rate = rows / elapsed if elapsed > 0 else 0
+        self.statusBar().showMessage(f'Импорт: {rows} строк, {rate:.0f} строк/с')
+    
+    def on_imported(self, stats):
+        message = (f"Загружено {stats['rows']} строк в {stats['table']} за {stats['seconds']:.2f} с "
+                   f"({stats['rows_per_second']:.0f} строк/с)")
+        if stats['cancelled']:
+            message = 'Импорт отменён, таблица не изменена'
+        elif stats['blank_rows'] or stats['uneven_rows']:
+            message += (f"\nПропущено пустых строк: {stats['blank_rows']}, строк с другим числом "
+                        f"значений (дополнены NULL или обрезаны): {stats['uneven_rows']}")
+        self.statusBar().showMessage(message)
+        if not stats['cancelled'] and self.is_connected:
+            QMessageBox.information(self, 'Импорт', message)
+            # Обновить список таблиц
+            self.create_tab('Tab1', 'SELECT * FROM sqlite_master')
+            self.populate_tables()
+    
+    def on_import_failed(self, message):
+        self.statusBar().showMessage('Импорт не выполнен')
+        QMessageBox.critical(self, 'Ошибка', f'Ошибка импорта: {message}')
+    
+    def on_import_finished(self):
+        if self.sender() is self.import_worker:
+            self.import_worker = None
     
     def on_bt1_clicked(self):
         """Обработчик нажатия кнопки bt1"""
@@ -289,17 +461,27 @@ class MainWindow(QMainWindow):
     
     def on_bt2_clicked(self):
         """Обработчик нажатия кнопки bt2"""
-        self.create_tab('Tab4', 'SELECT * FROM users')
+        self.create_builder_tab('Tab4', 'users')
     
     def on_bt3_clicked(self):
         """Обработчик нажатия кнопки bt3"""
-        self.create_tab('Tab5', 'SELECT * FROM products')
+        self.create_builder_tab('Tab5', 'products')
     
     def on_combo_changed(self, text):
         """Обработчик изменения выбора в ComboBox"""
         if text and text != 'QComboBox "Colums"':
-            query = f'SELECT {text} FROM users'
-            self.create_tab('Tab3', query)
+            self.create_builder_tab('Tab3', self.table_combo.currentText(), [text])
+    
+    def create_builder_tab(self, tab_name, table, columns=None):
+        """Вкладка с запросом из построителя"""
+        self.db_manager.refresh_schema()
+        # Имена таблицы и колонок проверяются по схеме, запрос не склеивается из ввода
+        try:
+            query, params = self.db_manager.builder.select(table, columns)
+        except ValueError as e:
+            QMessageBox.critical(self, 'Ошибка', str(e))
+            return
+        self.create_tab(tab_name, query, params)
 
 
 def main():
@@ -0,0 +1,120 @@
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+
+
+# Журнал медленных запросов (JSON Lines) в каталоге приложения, путь можно переопределить
+# переменной окружения; путь абсолютный, чтобы журнал не зависел от текущего каталога процесса
+SLOW_LOG_PATH = os.path.abspath(os.environ.get(
+    'LR3_SLOW_LOG_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slow_queries.jsonl')))
+# Запросы не быстрее этого порога (мс) попадают в журнал
+SLOW_QUERY_THRESHOLD_MS = 200
+# Сколько последних профилей держать в памяти
+RECENT_PROFILES = 200
+# Сколько записей журнала показывать
+SLOW_LOG_TAIL = 500
+
+# Способы доступа после имени в строке SCAN: индекс (USING [COVERING] INDEX, USING INTEGER PRIMARY KEY)
+# или модуль виртуальной таблицы
+SCAN_ACCESS_MARKERS = (' USING ', ' VIRTUAL TABLE ')
+# Строки плана, которые объявляют подзапросы и CTE; их SCAN - не проход по таблице базы
+SUBQUERY_PREFIXES = ('CO-ROUTINE ', 'MATERIALIZE ')
+
+
+def explain_plan(connection, query, params=()):
+    """Строки EXPLAIN QUERY PLAN; пустой список, если план получить нельзя"""
+    try:
+        return [row[3] for row in connection.execute('EXPLAIN QUERY PLAN ' + query, params)]
+    except sqlite3.Error:
+        return []
+
+
+def parse_scan(detail):
+    """
+    Разбор строки плана "SCAN [TABLE] <имя> [AS <псевдоним>] [<способ доступа>]"
+    (SCAN TABLE - в старых версиях SQLite; новые вместо имени таблицы пишут её псевдоним).
+    Возвращает (имя, способ доступа), где способ
+    None означает полный проход, или None, если строка не описывает проход по таблице
+    """
+    if not detail.startswith('SCAN '):
+        return None
+    target = detail[len('SCAN '):]
+    if target.startswith('TABLE '):
+        target = target[len('TABLE '):]
+
+    access = None
+    for marker in SCAN_ACCESS_MARKERS:
+        name, found, rest = target.partition(marker)
+        if found:
+            target, access = name, found.strip() + ' ' + rest
+            break
+
+    name = target.partition(' AS ')[0]
+    # SCAN CONSTANT ROW, SCAN SUBQUERY n и SCAN (subquery-n) не читают таблиц базы
+    if name == 'CONSTANT ROW' or name.startswith(('SUBQUERY ', '(')):
+        return None
+    return name, access
+
+
+def full_scans(plan):
+    """Таблицы, которые по плану читаются полным проходом без индекса"""
+    subqueries = set()
+    for detail in plan:
+        for prefix in SUBQUERY_PREFIXES:
+            if detail.startswith(prefix):
+                subqueries.add(detail[len(prefix):])
+
+    tables = []
+    for detail in plan:
+        scan = parse_scan(detail)
+        if scan is not None and scan[1] is None and scan[0] not in subqueries:
+            tables.append(scan[0])
+    return tables
+
+
+class QueryProfiler:
+    """Последние профили запросов и журнал медленных запросов на диске"""
+
+    def __init__(self, log_path=SLOW_LOG_PATH, threshold_ms=SLOW_QUERY_THRESHOLD_MS):
+        self.log_path = log_path
+        self.threshold_ms = threshold_ms
+        self.recent = deque(maxlen=RECENT_PROFILES)
+
+    def record(self, profile):
+        """Запомнить профиль; медленный запрос дописать в журнал. Возвращает True для медленного"""
+        profile = dict(profile)
+        profile.setdefault('recorded_at', time.time())
+        profile['full_scans'] = full_scans(profile.get('plan', []))
+        self.recent.append(profile)
+
+        if profile['wall_ms'] < self.threshold_ms:
+            return False
+        try:
+            with open(self.log_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(profile, ensure_ascii=False, default=str) + '\n')
+        except OSError as e:
+            print(f"Ошибка записи журнала медленных запросов: {e}")
+        return True
+
+    def slow_log(self, limit=SLOW_LOG_TAIL):
+        """Последние записи журнала медленных запросов"""
+        entries = deque(maxlen=limit)
+        try:
+            with open(self.log_path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Недописанная строка после аварийного завершения
+                        continue
+        except FileNotFoundError:
+            pass
+        return list(entries)
+
+    def clear_slow_log(self):
+        try:
+            os.remove(self.log_path)
+        except FileNotFoundError:
+            pass
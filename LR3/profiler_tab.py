@@ -0,0 +1,128 @@
+import time
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSpinBox,
+                             QComboBox, QTableWidget, QTableWidgetItem, QPlainTextEdit,
+                             QAbstractItemView, QSplitter)
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+
+from profiler import QueryProfiler
+
+
+COLUMNS = ['Время', 'Вкладка', 'Всего, мс', 'До 1-й строки, мс', 'Строк', 'Статус',
+           'Полный проход', 'Запрос']
+FULL_SCAN_COLOR = QColor('#ffe0e0')
+MODE_RECENT = 'Последние запросы'
+MODE_SLOW_LOG = 'Журнал медленных запросов'
+
+
+class ProfilerTab(QWidget):
+    """Вкладка профилировщика: время и планы запросов, журнал медленных запросов"""
+
+    def __init__(self, profiler=None, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler or QueryProfiler()
+        self.profiles = []
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        controls_layout = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems([MODE_RECENT, MODE_SLOW_LOG])
+        self.mode_combo.currentTextChanged.connect(self.refresh)
+        controls_layout.addWidget(self.mode_combo)
+        controls_layout.addWidget(QLabel('Порог медленного запроса, мс:'))
+        self.threshold_spin = QSpinBox()
+        self.threshold_spin.setRange(0, 3600 * 1000)
+        self.threshold_spin.setValue(int(self.profiler.threshold_ms))
+        self.threshold_spin.valueChanged.connect(self.on_threshold_changed)
+        controls_layout.addWidget(self.threshold_spin)
+        controls_layout.addStretch(1)
+        self.clear_button = QPushButton('Clear log')
+        self.clear_button.clicked.connect(self.on_clear_clicked)
+        controls_layout.addWidget(self.clear_button)
+        layout.addLayout(controls_layout)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.currentCellChanged.connect(self.on_current_changed)
+        splitter.addWidget(self.table)
+
+        # План выбранного запроса
+        self.plan_view = QPlainTextEdit()
+        self.plan_view.setReadOnly(True)
+        splitter.addWidget(self.plan_view)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+        layout.addWidget(splitter)
+
+    def record(self, tab_name, profile):
+        """Учесть профиль запроса вкладки"""
+        profile = dict(profile, tab=tab_name)
+        self.profiler.record(profile)
+        if self.mode_combo.currentText() == MODE_RECENT or profile['wall_ms'] >= self.profiler.threshold_ms:
+            self.refresh()
+
+    def refresh(self):
+        """Перестроить таблицу: новые запросы сверху"""
+        if self.mode_combo.currentText() == MODE_RECENT:
+            profiles = list(self.profiler.recent)
+        else:
+            profiles = self.profiler.slow_log()
+        self.profiles = profiles[::-1]
+
+        self.table.setRowCount(len(self.profiles))
+        for row, profile in enumerate(self.profiles):
+            first_row_ms = profile.get('first_row_ms')
+            scans = profile.get('full_scans', [])
+            values = [
+                time.strftime('%H:%M:%S', time.localtime(profile.get('recorded_at', 0))),
+                profile.get('tab', ''),
+                f"{profile['wall_ms']:.1f}",
+                '' if first_row_ms is None else f'{first_row_ms:.1f}',
+                str(profile.get('rows', '')),
+                profile.get('status') or '',
+                ', '.join(scans),
+                ' '.join(profile.get('query', '').split()),
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if scans:
+                    item.setBackground(FULL_SCAN_COLOR)
+                self.table.setItem(row, column, item)
+        self.table.resizeColumnsToContents()
+        self.plan_view.clear()
+
+    def on_current_changed(self, row, column, previous_row, previous_column):
+        if not 0 <= row < len(self.profiles):
+            self.plan_view.clear()
+            return
+        profile = self.profiles[row]
+        lines = [profile.get('query', '')]
+        if profile.get('params'):
+            lines.append(f"Параметры: {profile['params']}")
+        if profile.get('error'):
+            lines.append(f"Ошибка: {profile['error']}")
+        lines.append('')
+        lines.append('EXPLAIN QUERY PLAN:')
+        lines.extend(profile.get('plan') or ['(нет данных)'])
+        if profile.get('full_scans'):
+            lines.append('')
+            lines.append(f"Полный проход без индекса: {', '.join(profile['full_scans'])}")
+        self.plan_view.setPlainText('\n'.join(lines))
+
+    def on_threshold_changed(self, value):
+        self.profiler.threshold_ms = value
+
+    def on_clear_clicked(self):
+        self.profiler.clear_slow_log()
+        self.refresh()
@@ -0,0 +1,47 @@
+from importer import quote_identifier
+
+
+class QueryBuilder:
+    """
+    Построитель запросов с параметрами.
+
+    Имена таблиц и колонок сверяются со схемой из SchemaCache, значения
+    передаются только параметрами. Для одинаковых аргументов текст запроса
+    одинаков, поэтому подготовленный запрос берётся из кэша соединения
+    (sqlite3.connect(..., cached_statements=N)) и не разбирается заново.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+
+    def check_table(self, table):
+        if table not in self.schema.tables():
+            raise ValueError(f'Неизвестная таблица: {table}')
+
+    def check_columns(self, table, columns):
+        known = self.schema.columns(table)
+        for column in columns:
+            if column not in known:
+                raise ValueError(f'Неизвестная колонка {table}.{column}')
+
+    def select(self, table, columns=None, where=None, order_by=None, descending=False, limit=None):
+        """
+        SELECT из одной таблицы. where - словарь {колонка: значение}
+        (условия на равенство). Возвращает (sql, params).
+        """
+        where = where or {}
+        self.check_table(table)
+        self.check_columns(table, list(columns or []) + list(where) + ([order_by] if order_by else []))
+
+        column_sql = ', '.join(quote_identifier(column) for column in columns) if columns else '*'
+        sql = f'SELECT {column_sql} FROM {quote_identifier(table)}'
+        params = []
+        if where:
+            sql += ' WHERE ' + ' AND '.join(f'{quote_identifier(column)} = ?' for column in where)
+            params.extend(where.values())
+        if order_by:
+            sql += f' ORDER BY {quote_identifier(order_by)} {"DESC" if descending else "ASC"}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        return sql, tuple(params)
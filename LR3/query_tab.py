@@ -0,0 +1,410 @@
+import sqlite3
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableView, QLineEdit)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+
+from export_worker import ExportWorker
+from index_advisor import IndexWorker, missing_indexes
+from query_worker import QueryWorker
+from table_model import QueryTableModel
+from view_query import build_view_query, index_candidates
+
+
+# Сколько строк получать из курсора за одну порцию
+FETCH_BATCH_SIZE = 500
+# Сколько строк просматривать при подборе ширины колонок
+COLUMN_SIZE_SAMPLE_ROWS = 200
+# Задержка перезапуска запроса после ввода в поле фильтра, мс
+FILTER_DELAY_MS = 300
+
+
+class QueryTab(QWidget):
+    """
+    Вкладка с результатом запроса, выполняемого в отдельном потоке.
+    
+    Сортировка по щелчку на заголовке и фильтры колонок не обрабатывают
+    загруженные строки, а переписывают запрос вкладки (ORDER BY / WHERE),
+    так что их выполняет SQLite.
+    """
+    
+    failed = pyqtSignal(str)
+    # Кэш результатов использован (попадание, промах или новая запись)
+    cache_used = pyqtSignal()
+    # Пользователь хочет выгрузить результат запроса вкладки в файл
+    export_requested = pyqtSignal()
+    # Профиль завершённого запроса вкладки
+    profiled = pyqtSignal(dict)
+    
+    def __init__(self, pool, result_cache=None, schema=None, parent=None):
+        super().__init__(parent)
+        self.pool = pool
+        self.result_cache = result_cache
+        # Кэш схемы для подсказки об индексах
+        self.schema = schema
+        self.worker = None
+        self.export_worker = None
+        self.index_worker = None
+        # Исходный запрос вкладки и выполняемый запрос с сортировкой и фильтрами
+        self.base_query = None
+        self.base_params = ()
+        self.query = None
+        self.params = ()
+        self.sort_column = None
+        self.descending = False
+        self.filter_edits = {}
+        self.missing_index = (None, [])
+        self.columns_sized = False
+        
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.refresh)
+        
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        
+        # Строка состояния запроса и кнопка отмены
+        status_layout = QHBoxLayout()
+        self.status_label = QLabel()
+        status_layout.addWidget(self.status_label, 1)
+        self.cancel_button = QPushButton('Cancel')
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel)
+        status_layout.addWidget(self.cancel_button)
+        self.export_button = QPushButton('Export')
+        self.export_button.setEnabled(False)
+        self.export_button.clicked.connect(self.on_export_clicked)
+        status_layout.addWidget(self.export_button)
+        layout.addLayout(status_layout)
+        
+        # Подсказка о недостающем индексе
+        self.index_hint = QWidget()
+        hint_layout = QHBoxLayout()
+        hint_layout.setContentsMargins(0, 0, 0, 0)
+        self.index_hint.setLayout(hint_layout)
+        self.index_label = QLabel()
+        hint_layout.addWidget(self.index_label, 1)
+        self.index_button = QPushButton('Create index')
+        self.index_button.clicked.connect(self.create_indexes)
+        hint_layout.addWidget(self.index_button)
+        self.index_hint.hide()
+        layout.addWidget(self.index_hint)
+        
+        # Поля фильтров, по одному на колонку
+        self.filter_layout = QHBoxLayout()
+        layout.addLayout(self.filter_layout)
+        
+        self.table_view = QTableView()
+        header = self.table_view.horizontalHeader()
+        header.setResizeContentsPrecision(COLUMN_SIZE_SAMPLE_ROWS)
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicatorClearable(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.on_sort_changed)
+        layout.addWidget(self.table_view)
+    
+    def run_query(self, query, params=()):
+        """Выполнить запрос вкладки, сохранив сортировку и фильтры, если запрос тот же"""
+        if query != self.base_query:
+            self.reset_view()
+        self.base_query = query
+        self.base_params = tuple(params)
+        self.refresh()
+    
+    def reset_view(self):
+        """Сбросить сортировку и фильтры"""
+        self.filter_timer.stop()
+        self.sort_column = None
+        self.descending = False
+        header = self.table_view.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.blockSignals(False)
+        self.set_filter_columns([])
+    
+    def set_filter_columns(self, columns):
+        """Пересоздать поля фильтров под колонки результата"""
+        if list(self.filter_edits) == list(columns):
+            return
+        for edit in self.filter_edits.values():
+            edit.deleteLater()
+        self.filter_edits = {}
+        for column in columns:
+            edit = QLineEdit()
+            edit.setPlaceholderText(column)
+            edit.setToolTip('Подстрока, шаблон LIKE с % или =значение для точного совпадения')
+            edit.textEdited.connect(self.filter_timer.start)
+            self.filter_layout.addWidget(edit)
+            self.filter_edits[column] = edit
+    
+    def filters(self):
+        return {column: edit.text() for column, edit in self.filter_edits.items() if edit.text()}
+    
+    def refresh(self):
+        """Перевыполнить запрос вкладки с текущими сортировкой и фильтрами"""
+        if self.base_query is None:
+            return
+        query, params = build_view_query(
+            self.base_query, self.sort_column, self.descending, self.filters(), self.base_params
+        )
+        self.execute(query, params)
+        self.update_index_hint()
+    
+    def execute(self, query, params=()):
+        """Показать результат из кэша или запустить запрос в новом потоке"""
+        cached = None
+        if self.result_cache is not None:
+            cached = self.result_cache.get(query, params)
+            self.cache_used.emit()
+        if cached is not None:
+            self.show_result(query, params, *cached)
+            return
+        
+        self.stop()
+        size_limit = self.result_cache.budget_bytes if self.result_cache is not None else 0
+        worker = QueryWorker(self.pool, query, params, FETCH_BATCH_SIZE, size_limit, self)
+        model = QueryTableModel(worker, self)
+        worker.columns_ready.connect(self.on_columns_ready)
+        worker.rows_fetched.connect(self.on_rows_fetched)
+        worker.progress.connect(self.on_progress)
+        worker.waiting.connect(self.on_waiting)
+        worker.profiled.connect(self.profiled)
+        worker.exhausted.connect(self.on_exhausted)
+        worker.cancelled.connect(self.on_cancelled)
+        worker.failed.connect(self.on_failed)
+        worker.finished.connect(self.on_worker_finished)
+        worker.finished.connect(worker.deleteLater)
+        
+        self.set_model(model)
+        self.worker = worker
+        self.query = query
+        self.params = params
+        self.export_button.setEnabled(True)
+        self.columns_sized = False
+        self.status_label.setText('Выполняется...')
+        self.cancel_button.setEnabled(True)
+        worker.start()
+    
+    def show_result(self, query, params, columns, rows):
+        """Показать готовый результат без выполнения запроса"""
+        self.stop()
+        self.set_model(QueryTableModel.from_result(columns, rows, self))
+        self.query = query
+        self.params = params
+        self.set_filter_columns(columns)
+        self.export_button.setEnabled(True)
+        self.table_view.resizeColumnsToContents()
+        self.status_label.setText(f'Готово (из кэша): строк {len(rows)}')
+    
+    def set_model(self, model):
+        old_model = self.table_view.model()
+        self.table_view.setModel(model)
+        if old_model is not None:
+            old_model.deleteLater()
+    
+    def cancel(self):
+        """Прервать выполняющийся запрос вкладки"""
+        if self.worker is not None:
+            self.worker.cancel()
+    
+    def stop(self, wait=False):
+        """Отменить текущий запрос; при wait дождаться завершения потока"""
+        worker, self.worker = self.worker, None
+        if worker is None:
+            return
+        worker.cancel()
+        if wait:
+            worker.wait()
+        self.cancel_button.setEnabled(False)
+    
+    def shutdown(self):
+        """Остановить все потоки вкладки и дождаться их завершения"""
+        self.filter_timer.stop()
+        self.stop(wait=True)
+        self.stop_export(wait=True)
+        if self.index_worker is not None:
+            self.index_worker.wait()
+    
+    def on_sort_changed(self, section, order):
+        """Щелчок по заголовку: сортировка на стороне SQLite"""
+        columns = self.table_view.model().columns if self.table_view.model() else []
+        if 0 <= section < len(columns):
+            self.sort_column = columns[section]
+            self.descending = order == Qt.SortOrder.DescendingOrder
+        else:
+            self.sort_column = None
+            self.descending = False
+        self.refresh()
+    
+    def update_index_hint(self):
+        """Предложить индекс, если сортировка или точный фильтр пойдут полным проходом"""
+        candidates = index_candidates(self.sort_column, self.filters())
+        table, missing = (None, [])
+        if candidates and self.index_worker is None and self.schema is not None:
+            try:
+                # Одна проверка схемы на действие пользователя
+                self.schema.check()
+                table, missing = missing_indexes(self.schema, self.base_query, candidates)
+            except sqlite3.Error:
+                table, missing = (None, [])
+        self.missing_index = (table, missing)
+        if not missing:
+            self.index_hint.hide()
+            return
+        self.index_label.setText(
+            f'Нет индекса по {table}({", ".join(missing)}): SQLite просмотрит всю таблицу'
+        )
+        self.index_button.setEnabled(True)
+        self.index_hint.show()
+    
+    def create_indexes(self):
+        """Построить недостающие индексы в отдельном потоке"""
+        table, columns = self.missing_index
+        if not columns or self.index_worker is not None:
+            return
+        worker = IndexWorker(self.pool.db_name, table, columns, self)
+        worker.created.connect(self.on_indexes_created)
+        worker.failed.connect(self.on_index_failed)
+        worker.finished.connect(self.on_index_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.index_worker = worker
+        self.index_button.setEnabled(False)
+        self.index_label.setText(f'Создание индекса по {table}({", ".join(columns)})...')
+        worker.start()
+    
+    def on_indexes_created(self, names):
+        self.index_hint.hide()
+    
+    def on_index_failed(self, message):
+        self.index_label.setText(f'Не удалось создать индекс: {message}')
+    
+    def on_index_finished(self):
+        self.index_worker = None
+        # С новым индексом тот же запрос выполнится по индексу
+        if not self.index_hint.isVisible():
+            self.refresh()
+    
+    def on_export_clicked(self):
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+        elif self.query is not None:
+            self.export_requested.emit()
+    
+    def start_export(self, path, file_format=None):
+        """Выгрузить результат запроса вкладки в файл в отдельном потоке"""
+        if self.export_worker is not None or self.query is None:
+            return
+        worker = ExportWorker(self.pool, self.query, self.params, path, file_format, self)
+        worker.progress.connect(self.on_export_progress)
+        worker.exported.connect(self.on_exported)
+        worker.cancelled.connect(self.on_export_cancelled)
+        worker.failed.connect(self.on_export_failed)
+        worker.finished.connect(self.on_export_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.export_worker = worker
+        self.export_button.setText('Cancel export')
+        self.status_label.setText('Экспорт...')
+        worker.start()
+    
+    def stop_export(self, wait=False):
+        """Прервать экспорт; при wait дождаться завершения потока"""
+        worker, self.export_worker = self.export_worker, None
+        if worker is None:
+            return
+        worker.cancel()
+        if wait:
+            worker.wait()
+        self.export_button.setText('Export')
+    
+    def on_export_progress(self, rows_count, elapsed):
+        if self.sender() is not self.export_worker:
+            return
+        rate = rows_count / elapsed if elapsed > 0 else 0
+        self.status_label.setText(f'Экспорт: строк {rows_count}, {elapsed:.1f} с ({rate:.0f} строк/с)')
+    
+    def on_exported(self, stats):
+        if self.sender() is not self.export_worker:
+            return
+        self.status_label.setText(
+            f"Экспортировано строк {stats['rows']} в {stats['path']} за {stats['seconds']:.2f} с"
+        )
+    
+    def on_export_cancelled(self):
+        if self.sender() is not self.export_worker:
+            return
+        self.status_label.setText('Экспорт отменён')
+    
+    def on_export_failed(self, message):
+        if self.sender() is not self.export_worker:
+            return
+        self.status_label.setText(f'Ошибка экспорта: {message}')
+        self.failed.emit(f'экспорт не выполнен: {message}')
+    
+    def on_export_finished(self):
+        if self.sender() is self.export_worker:
+            self.export_worker = None
+            self.export_button.setText('Export')
+    
+    def on_worker_finished(self):
+        if self.is_current():
+            self.worker = None
+    
+    def is_current(self):
+        return self.sender() is self.worker
+    
+    def on_columns_ready(self, columns):
+        if self.is_current():
+            self.set_filter_columns(columns)
+    
+    def on_rows_fetched(self, batch):
+        if not self.is_current():
+            return
+        self.status_label.setText(
+            f'Загружено строк: {self.worker.rows_count}, {self.worker.elapsed():.2f} с'
+        )
+        # Ширина колонок подбирается по первой порции, а не по всей таблице
+        if not self.columns_sized:
+            self.columns_sized = True
+            self.table_view.resizeColumnsToContents()
+    
+    def on_progress(self, rows_count, elapsed):
+        if not self.is_current():
+            return
+        self.status_label.setText(f'Выполняется... строк: {rows_count}, {elapsed:.1f} с')
+    
+    def on_waiting(self):
+        if not self.is_current():
+            return
+        self.status_label.setText('Ожидание свободного соединения...')
+    
+    def on_exhausted(self):
+        if not self.is_current():
+            return
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText(
+            f'Готово: строк {self.worker.rows_count}, {self.worker.elapsed():.2f} с'
+        )
+        if self.result_cache is not None:
+            model = self.table_view.model()
+            self.result_cache.put(self.query, self.params, model.columns, model.rows,
+                                  self.worker.rows_bytes)
+            self.cache_used.emit()
+    
+    def on_cancelled(self):
+        if not self.is_current():
+            return
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText(f'Отменено: загружено строк {self.worker.rows_count}')
+    
+    def on_failed(self, message):
+        if not self.is_current():
+            return
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText(f'Ошибка: {message}')
+        self.failed.emit(message)
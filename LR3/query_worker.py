@@ -0,0 +1,219 @@
+import sqlite3
+import threading
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from profiler import explain_plan
+from result_cache import rows_size
+
+
+# Через сколько инструкций виртуальной машины SQLite вызывать обработчик прогресса
+PROGRESS_HANDLER_STEPS = 10000
+# Как часто (в секундах) отправлять прогресс в интерфейс
+PROGRESS_INTERVAL = 0.1
+# Как долго ждать свободное соединение между проверками отмены, с
+ACQUIRE_TIMEOUT = 0.1
+# Через сколько секунд без запросов новых порций вернуть соединение в пул:
+# открытый курсор держит транзакцию чтения, а с ней и контрольную точку WAL
+IDLE_RELEASE_SECONDS = 5.0
+
+
+class QueryWorker(QThread):
+    """Поток, выполняющий запрос на соединении из пула и отдающий строки порциями"""
+    
+    columns_ready = pyqtSignal(list)
+    rows_fetched = pyqtSignal(list)
+    progress = pyqtSignal(int, float)
+    exhausted = pyqtSignal()
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+    
+    waiting = pyqtSignal()
+    # Профиль запроса по первой порции строк (или по ошибке до неё): время, число строк, план
+    profiled = pyqtSignal(dict)
+    
+    def __init__(self, pool, query, params, batch_size, size_limit=0, parent=None):
+        super().__init__(parent)
+        self.pool = pool
+        self.query = query
+        self.params = params
+        self.batch_size = batch_size
+        self.connection = None
+        self.rows_count = 0
+        # Объём загруженных строк для кэша результатов; считается здесь, а не в потоке
+        # интерфейса, и перестаёт считаться (None), когда превысит size_limit
+        self.size_limit = size_limit
+        self.rows_bytes = 0
+        self.started_at = None
+        self.last_progress = 0.0
+        self.first_row_ms = None
+        # Время ожидания запросов следующих порций не входит во время выполнения
+        self.waited = 0.0
+        self.plan = []
+        self.status = None
+        self.profile_sent = False
+        # Порции выдаются по запросу модели (fetchMore)
+        self.demand = 1
+        self.cancel_requested = False
+        self.condition = threading.Condition()
+    
+    def request_batch(self):
+        """Запросить у потока ещё одну порцию строк"""
+        with self.condition:
+            self.demand += 1
+            self.condition.notify()
+    
+    def cancel(self):
+        """Прервать выполняющийся запрос"""
+        with self.condition:
+            self.cancel_requested = True
+            self.condition.notify()
+            # Под блокировкой: соединение не может уйти в пул к другому запросу
+            if self.connection is not None:
+                self.connection.interrupt()
+    
+    def run(self):
+        self.started_at = time.monotonic()
+        cursor = None
+        error = None
+        try:
+            connection = self._acquire()
+            if connection is None:
+                self.cancelled.emit()
+                return
+            # Ожидание свободного соединения не считается временем запроса
+            self.started_at = time.monotonic()
+            self.plan = explain_plan(connection, self.query, self.params)
+            cursor = self._execute(connection)
+            description = cursor.description or []
+            self.columns_ready.emit([column[0] for column in description])
+            
+            while True:
+                with self.condition:
+                    if self.demand == 0 and not self.cancel_requested:
+                        wait_started = time.monotonic()
+                        if not self.condition.wait_for(self._wanted, IDLE_RELEASE_SECONDS):
+                            cursor = self._park(cursor)
+                            self.condition.wait_for(self._wanted)
+                        self.waited += time.monotonic() - wait_started
+                    if self.cancel_requested:
+                        # Остановлен между порциями: результат прочитан не до конца
+                        self.status = 'stopped'
+                        self.cancelled.emit()
+                        break
+                    self.demand -= 1
+                
+                if cursor is None:
+                    # Соединение было возвращено в пул: продолжить с непрочитанной строки
+                    connection = self._acquire()
+                    if connection is None:
+                        self.status = 'stopped'
+                        self.cancelled.emit()
+                        break
+                    cursor = self._execute(connection, self.rows_count)
+                
+                batch = cursor.fetchmany(self.batch_size)
+                if self.first_row_ms is None:
+                    self.first_row_ms = self.elapsed() * 1000
+                self.rows_count += len(batch)
+                if self.rows_bytes is not None:
+                    self.rows_bytes += rows_size(batch)
+                    if self.rows_bytes > self.size_limit:
+                        self.rows_bytes = None
+                self.last_progress = time.monotonic()
+                self.rows_fetched.emit(batch)
+                done = len(batch) < self.batch_size
+                self.status = 'done' if done else 'open'
+                if not self.profile_sent:
+                    # Недочитанный результат может остаться открытым сколько угодно,
+                    # поэтому профиль отправляется по первой порции
+                    self._send_profile()
+                if done:
+                    self.exhausted.emit()
+                    break
+        except sqlite3.Error as e:
+            if self.cancel_requested:
+                self.status = 'cancelled'
+                self.cancelled.emit()
+            else:
+                self.status = 'failed'
+                error = str(e)
+                self.failed.emit(error)
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self._release()
+            if self.status is not None and not self.profile_sent:
+                self._send_profile(error)
+    
+    def _wanted(self):
+        return self.demand > 0 or self.cancel_requested
+    
+    def _execute(self, connection, offset=0):
+        """Выполнить запрос, пропустив offset уже выданных строк"""
+        connection.set_progress_handler(self._on_progress, PROGRESS_HANDLER_STEPS)
+        if offset == 0:
+            return connection.execute(self.query, self.params)
+        query = self.query.strip().rstrip(';')
+        return connection.execute(f'SELECT * FROM ({query}) LIMIT -1 OFFSET ?',
+                                  (*self.params, offset))
+    
+    def _park(self, cursor):
+        """Закрыть курсор и вернуть соединение в пул до запроса следующей порции"""
+        cursor.close()
+        self._release()
+        return None
+    
+    def _release(self):
+        with self.condition:
+            connection, self.connection = self.connection, None
+        if connection is not None:
+            self.pool.release(connection)
+    
+    def _send_profile(self, error=None):
+        self.profile_sent = True
+        self.profiled.emit(self.profile(error))
+    
+    def profile(self, error=None):
+        """Сводка о выполнении запроса для профилировщика"""
+        return {
+            'query': self.query,
+            'params': list(self.params),
+            'status': self.status,
+            'error': error,
+            'rows': self.rows_count,
+            'wall_ms': (self.elapsed() - self.waited) * 1000,
+            'first_row_ms': self.first_row_ms,
+            'plan': self.plan,
+        }
+    
+    def _acquire(self):
+        """Дождаться свободного соединения из пула; None при отмене"""
+        connection = self.pool.acquire(timeout=0)
+        if connection is None:
+            self.waiting.emit()
+        while connection is None:
+            if self.cancel_requested:
+                return None
+            connection = self.pool.acquire(timeout=ACQUIRE_TIMEOUT)
+        with self.condition:
+            self.connection = connection
+        return connection
+    
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return time.monotonic() - self.started_at
+    
+    def _emit_progress(self):
+        self.last_progress = time.monotonic()
+        self.progress.emit(self.rows_count, self.elapsed())
+    
+    def _on_progress(self):
+        """Обработчик прогресса SQLite: ненулевой результат прерывает запрос"""
+        if self.cancel_requested:
+            return 1
+        if time.monotonic() - self.last_progress >= PROGRESS_INTERVAL:
+            self._emit_progress()
+        return 0
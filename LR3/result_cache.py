@@ -0,0 +1,142 @@
+import re
+import sys
+from collections import OrderedDict
+
+
+# Строковые литералы и идентификаторы в кавычках при нормализации не меняются
+SQL_TOKEN_RE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])")
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(query):
+    """Привести текст запроса к ключу кэша: пробелы и регистр вне кавычек не важны"""
+    parts = SQL_TOKEN_RE.split(query.strip().rstrip(';').strip())
+    for i in range(0, len(parts), 2):
+        parts[i] = WHITESPACE_RE.sub(' ', parts[i]).lower()
+    return ''.join(parts)
+
+
+def rows_size(rows):
+    """Приблизительный объём строк в памяти без самого списка, в байтах"""
+    size = 0
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+def estimate_size(columns, rows, rows_bytes=None):
+    """Приблизительный объём результата в памяти, в байтах; rows_bytes - готовый rows_size(rows)"""
+    if rows_bytes is None:
+        rows_bytes = rows_size(rows)
+    return sys.getsizeof(rows) + sum(sys.getsizeof(column) for column in columns) + rows_bytes
+
+
+class ResultCache:
+    """LRU-кэш результатов запросов, сбрасываемый при изменении базы данных"""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        # (запрос, параметры) -> (columns, rows, size); порядок - от давно использованных к недавним
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        # Версия данных, на которой был начат каждый ещё не сохранённый запрос
+        self.pending = {}
+        self.monitor = None
+        self.data_version = None
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    def attach(self, connection):
+        """Следить за изменениями базы через отдельное соединение"""
+        self.detach()
+        self.monitor = connection
+        self.data_version = self._read_data_version()
+
+    def detach(self):
+        """Закрыть соединение-наблюдатель и очистить кэш"""
+        if self.monitor is not None:
+            self.monitor.close()
+            self.monitor = None
+        self.data_version = None
+        self.clear()
+
+    def check_version(self):
+        """Сбросить кэш, если с прошлой проверки базу изменило другое соединение"""
+        if self.monitor is None:
+            return
+        version = self._read_data_version()
+        if version != self.data_version:
+            self.data_version = version
+            if self.entries:
+                self.stats['invalidations'] += 1
+            self.clear()
+
+    def get(self, query, params=()):
+        """Вернуть (columns, rows) из кэша или None"""
+        self.check_version()
+        key = (normalize_sql(query), tuple(params))
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            self.pending[key] = self.data_version
+            return None
+        self.entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry[0], entry[1]
+
+    def put(self, query, params, columns, rows, rows_bytes):
+        """
+        Сохранить полностью загруженный результат запроса, начатого после промаха get.
+
+        rows_bytes - объём строк (rows_size), посчитанный потоком запроса по мере
+        загрузки порций, или None, если результат заведомо больше бюджета: строки
+        не обходятся заново и не копируются, модель их после загрузки не меняет.
+        """
+        self.check_version()
+        key = (normalize_sql(query), tuple(params))
+        if key not in self.pending or self.pending.pop(key) != self.data_version:
+            # База изменилась, пока запрос выполнялся: результат уже не актуален
+            return False
+        if rows_bytes is None:
+            return False
+
+        size = estimate_size(columns, rows, rows_bytes)
+        if size > self.budget_bytes:
+            return False
+
+        self._remove(key)
+        self.entries[key] = (list(columns), rows, size)
+        self.size_bytes += size
+        self.stats['stores'] += 1
+        self._evict()
+        return True
+
+    def clear(self):
+        self.entries.clear()
+        self.pending.clear()
+        self.size_bytes = 0
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._evict()
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
+
+    def _evict(self):
+        while self.size_bytes > self.budget_bytes and self.entries:
+            _, (_, _, size) = self.entries.popitem(last=False)
+            self.size_bytes -= size
+            self.stats['evictions'] += 1
+
+    def _read_data_version(self):
+        # data_version меняется только после фиксации транзакций других соединений,
+        # поэтому у наблюдателя должно быть своё соединение
+        return self.monitor.execute('PRAGMA data_version').fetchone()[0]
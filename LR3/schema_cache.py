@@ -0,0 +1,95 @@
+from importer import quote_identifier
+
+
+class SchemaCache:
+    """
+    Кэш схемы базы: таблицы, колонки и индексы.
+
+    Методы чтения не обращаются к базе. Актуальность схемы проверяет check()
+    по PRAGMA schema_version, которое SQLite увеличивает при каждом изменении
+    схемы любым соединением; его вызывают один раз на действие пользователя.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.version = None
+        # таблица -> список колонок / {имя индекса: список колонок}
+        self.table_columns = {}
+        self.table_indexes = {}
+        # таблица -> колонка INTEGER PRIMARY KEY (псевдоним rowid) или None
+        self.table_rowid = {}
+        self.stats = {'checks': 0, 'reloads': 0}
+
+    def check(self):
+        """Перечитать схему, если она изменилась. Возвращает True при перечитывании"""
+        self.stats['checks'] += 1
+        version = self.connection.execute('PRAGMA schema_version').fetchone()[0]
+        if version == self.version:
+            return False
+        self.load()
+        self.version = version
+        return True
+
+    def load(self):
+        self.stats['reloads'] += 1
+        tables = [
+            row[0] for row in self.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+        ]
+        self.table_columns = {}
+        self.table_indexes = {}
+        self.table_rowid = {}
+        for table in tables:
+            quoted = quote_identifier(table)
+            columns = []
+            primary_keys = []
+            for _, name, column_type, _, _, pk in self.connection.execute(f'PRAGMA table_info({quoted})'):
+                columns.append(name)
+                if pk:
+                    primary_keys.append((name, column_type))
+            self.table_columns[table] = columns
+            # INTEGER PRIMARY KEY - это сам rowid, отдельный индекс ему не нужен
+            self.table_rowid[table] = (
+                primary_keys[0][0]
+                if len(primary_keys) == 1 and primary_keys[0][1].upper() == 'INTEGER' else None
+            )
+            indexes = {}
+            for index in self.connection.execute(f'PRAGMA index_list({quoted})').fetchall():
+                indexes[index[1]] = [
+                    row[2] for row in self.connection.execute(
+                        f'PRAGMA index_info({quote_identifier(index[1])})'
+                    )
+                ]
+            self.table_indexes[table] = indexes
+
+    def loaded(self):
+        # Схема читается при первом обращении, дальше - только через check()
+        if self.version is None:
+            self.check()
+
+    def tables(self):
+        self.loaded()
+        return list(self.table_columns)
+
+    def find_table(self, name):
+        """Имя таблицы в схеме без учёта регистра, как его сравнивает SQLite, или None"""
+        self.loaded()
+        lowered = name.lower()
+        for table in self.table_columns:
+            if table.lower() == lowered:
+                return table
+        return None
+
+    def columns(self, table):
+        self.loaded()
+        return list(self.table_columns.get(table, []))
+
+    def indexes(self, table):
+        self.loaded()
+        return dict(self.table_indexes.get(table, {}))
+
+    def rowid_column(self, table):
+        self.loaded()
+        return self.table_rowid.get(table)
@@ -0,0 +1,88 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class QueryTableModel(QAbstractTableModel):
+    """Модель таблицы, получающая строки порциями из потока запроса"""
+    
+    def __init__(self, worker, parent=None):
+        super().__init__(parent)
+        self.worker = worker
+        self.columns = []
+        # Строки храним кортежами в том виде, в каком их отдаёт sqlite3
+        self.rows = []
+        self.exhausted = False
+        # Порция уже запрошена у потока и ещё не пришла
+        self.pending = True
+        
+        if worker is None:
+            return
+        worker.columns_ready.connect(self.set_columns)
+        worker.rows_fetched.connect(self.append_rows)
+        worker.exhausted.connect(self.close)
+        worker.cancelled.connect(self.close)
+        worker.failed.connect(self.close)
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return str(self.rows[index.row()][index.column()])
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            # Заголовок может запросить секцию до того, как придут колонки нового запроса
+            if section >= len(self.columns):
+                return None
+            return self.columns[section]
+        return section + 1
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self.exhausted and not self.pending
+    
+    def fetchMore(self, parent=QModelIndex()):
+        """Запросить у потока следующую порцию строк"""
+        if not self.canFetchMore(parent):
+            return
+        self.pending = True
+        self.worker.request_batch()
+    
+    @classmethod
+    def from_result(cls, columns, rows, parent=None):
+        """Модель с уже загруженным результатом (например, из кэша)"""
+        model = cls(None, parent)
+        model.columns = columns
+        model.rows = rows
+        model.close()
+        return model
+    
+    def set_columns(self, columns):
+        self.beginResetModel()
+        self.columns = columns
+        self.endResetModel()
+    
+    def append_rows(self, batch):
+        self.pending = False
+        if not batch:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self.rows.extend(batch)
+        self.endInsertRows()
+    
+    def close(self):
+        """Больше не запрашивать строки, загруженные строки остаются в модели"""
+        self.exhausted = True
+        self.pending = False
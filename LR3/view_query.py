@@ -0,0 +1,55 @@
+from importer import quote_identifier
+
+
+def parse_filter(text):
+    """
+    Условие фильтра колонки и его параметр.
+
+    "=значение" - точное совпадение (может использовать индекс),
+    текст с % - шаблон LIKE как есть, иначе - поиск подстроки.
+    """
+    if text.startswith('='):
+        return '= ?', text[1:]
+    if '%' in text:
+        return 'LIKE ?', text
+    return 'LIKE ?', f'%{text}%'
+
+
+def build_view_query(base_query, sort_column=None, descending=False, filters=None, base_params=()):
+    """
+    Обернуть запрос вкладки в SELECT с фильтрами и сортировкой.
+
+    Сортировка и фильтрация выполняются SQLite, значения фильтров
+    передаются параметрами после параметров исходного запроса.
+    Возвращает (sql, params).
+    """
+    base_query = base_query.strip().rstrip(';')
+    conditions = []
+    params = list(base_params)
+    for column, text in (filters or {}).items():
+        if not text:
+            continue
+        condition, param = parse_filter(text)
+        conditions.append(f'{quote_identifier(column)} {condition}')
+        params.append(param)
+
+    if not conditions and sort_column is None:
+        return base_query, tuple(params)
+
+    sql = f'SELECT * FROM ({base_query})'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    if sort_column is not None:
+        sql += f' ORDER BY {quote_identifier(sort_column)} {"DESC" if descending else "ASC"}'
+    return sql, tuple(params)
+
+
+def index_candidates(sort_column, filters):
+    """Колонки, которым помог бы индекс: сортировка и точные фильтры"""
+    columns = []
+    if sort_column is not None:
+        columns.append(sort_column)
+    for column, text in (filters or {}).items():
+        if text.startswith('=') and column not in columns:
+            columns.append(column)
+    return columns
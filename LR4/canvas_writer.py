@@ -0,0 +1,148 @@
+import os
+import hashlib
+import threading
+from time import perf_counter
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+# Уровень сжатия PNG, как у zlib: 0 - без сжатия, 9 - максимальное;
+# можно переопределить переменной окружения
+PNG_COMPRESSION_LEVEL = int(os.environ.get('LR4_PNG_COMPRESSION', 6))
+
+
+def png_quality(level):
+    """
+    Параметр quality для QImage.save по уровню сжатия zlib.
+    Qt вычисляет уровень как (100 - quality) * 9 / 91.
+    """
+    level = min(max(int(level), 0), 9)
+    return (9 - level) * 91 // 9
+
+
+def image_digest(image):
+    """Хэш пикселей изображения"""
+    bits = image.constBits()
+    bits.setsize(image.byteCount())
+    return hashlib.blake2b(bits.asstring(), digest_size=16).digest()
+
+
+def write_png(image, filename, level=PNG_COMPRESSION_LEVEL, fsync=False):
+    """
+    Атомарная запись PNG: во временный файл рядом, затем переименование,
+    чтобы на диске никогда не оставалось недописанного снимка.
+    fsync=True дожидается записи файла на диск до переименования.
+    Возвращает размер файла в байтах.
+    """
+    tmp_filename = filename + '.tmp'
+    if not image.save(tmp_filename, 'PNG', png_quality(level)):
+        try:
+            os.remove(tmp_filename)
+        except FileNotFoundError:
+            pass
+        raise OSError(f'не удалось записать {tmp_filename}')
+    if fsync:
+        with open(tmp_filename, 'rb') as file:
+            os.fsync(file.fileno())
+    os.replace(tmp_filename, filename)
+    return os.path.getsize(filename)
+
+
+class WriteTask(QRunnable):
+    """Задача пула: записывает последние снимки, пока они поступают"""
+
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    def run(self):
+        while True:
+            snapshot = self.writer.take_pending()
+            if snapshot is None:
+                return
+            self.writer.write(*snapshot)
+
+
+class CallTask(QRunnable):
+    """Задача пула: вызов функции в потоке записи"""
+
+    def __init__(self, function):
+        super().__init__()
+        self.function = function
+
+    def run(self):
+        try:
+            self.function()
+        except OSError as e:
+            print(f"Ошибка записи: {e}")
+
+
+class SnapshotWriter(QObject):
+    """
+    Кодирование и запись снимков холста в отдельном пуле потоков.
+
+    Ожидает записи не больше одного снимка: более новый снимок заменяет
+    ещё не начатый старый, и тот не кодируется вовсе.
+    """
+
+    # {'status': 'saved' | 'skipped' | 'failed', 'filename', 'bytes', 'encode_ms', 'error'}
+    finished = pyqtSignal(dict)
+
+    def __init__(self, compression_level=PNG_COMPRESSION_LEVEL, fsync=False, parent=None):
+        super().__init__(parent)
+        self.compression_level = compression_level
+        self.fsync = fsync
+        # Свой пул из одного потока: записи одного файла идут по порядку
+        # и не занимают глобальный пул Qt
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.lock = threading.Lock()
+        self.pending = None
+        self.running = False
+        # Имя и хэш содержимого последнего записанного файла, доступны только потоку пула
+        self.saved = None
+
+    def submit(self, image, filename):
+        """
+        Поставить снимок в очередь. Возвращает заменённый им ещё не записанный
+        снимок (image, filename) или None
+        """
+        with self.lock:
+            dropped = self.pending
+            self.pending = (image, filename)
+            if self.running:
+                return dropped
+            self.running = True
+        self.pool.start(WriteTask(self))
+        return dropped
+
+    def take_pending(self):
+        with self.lock:
+            snapshot = self.pending
+            self.pending = None
+            if snapshot is None:
+                self.running = False
+            return snapshot
+
+    def write(self, image, filename):
+        result = {'status': 'skipped', 'filename': filename, 'bytes': 0, 'encode_ms': 0.0}
+        try:
+            saved = (filename, image_digest(image))
+            if saved != self.saved:
+                started = perf_counter()
+                result['bytes'] = write_png(image, filename, self.compression_level, self.fsync)
+                result['encode_ms'] = (perf_counter() - started) * 1000
+                result['status'] = 'saved'
+                self.saved = saved
+        except OSError as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+        self.finished.emit(result)
+
+    def run(self, function):
+        """Выполнить function в потоке записи, по очереди с записью снимков"""
+        self.pool.start(CallTask(function))
+
+    def wait(self):
+        """Дождаться записи всех поставленных снимков"""
+        self.pool.waitForDone()
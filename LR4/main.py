@@ -1,37 +1,264 @@
 import sys
+from functools import partial
 from pathlib import Path
-from PyQt5.QtCore import QUrl, QObject, QTimer, pyqtSignal
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QUrl, QObject, QTimer, QRect, QSize, pyqtSignal, pyqtSlot, pyqtProperty
+from PyQt5.QtGui import QImage, QColor
+from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtQml import QQmlApplicationEngine
 from datetime import *
 
+from canvas_writer import SnapshotWriter, PNG_COMPRESSION_LEVEL
+from undo_history import TileHistory, TileImageProvider, UNDO_MEMORY_LIMIT
+from stroke_journal import StrokeJournal, CHECKPOINT_COMPRESSION_LEVEL
+
 
 class Interface(QObject):
     SAVE_DIRECTORY = "saved_canvas"
-    TIMER_INTERVAL_MS = 5000
-    
+    # Сохранение через столько мс после последнего изменения холста
+    SAVE_DEBOUNCE_MS = 1000
+    # Но не позже чем через столько мс после первого несохранённого изменения
+    SAVE_MAX_LATENCY_MS = 5000
+    # Журнал штрихов сбрасывается на диск (fsync) не чаще чем раз в столько мс
+    JOURNAL_SYNC_MS = 1000
+
     hashPrint = hex(abs(hash(f'{datetime.now()}')))[2:]
     saveRequested = pyqtSignal(str)
-    
-    def __init__(self):
+    statsChanged = pyqtSignal()
+    historyChanged = pyqtSignal()
+    # Плитки для перерисовки после отмены или повтора: [{x, y, width, height, source}]
+    tilesRestored = pyqtSignal('QVariantList')
+
+    def __init__(self, compression_level=PNG_COMPRESSION_LEVEL, undo_memory_limit=UNDO_MEMORY_LIMIT):
         super().__init__()
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.on_timer_timeout)
-        self.timer.start(self.TIMER_INTERVAL_MS)
-        
+        self.dirty = False
+        self.stats = {'saves': 0, 'skipped': 0, 'dropped': 0, 'failed': 0,
+                      'bytes_written': 0, 'encode_ms': 0.0, 'last_encode_ms': 0.0}
+
+        self.debounce_timer = QTimer()
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.timeout.connect(self.on_timer_timeout)
+        self.latency_timer = QTimer()
+        self.latency_timer.setSingleShot(True)
+        self.latency_timer.timeout.connect(self.on_timer_timeout)
+
+        # Кодирование и запись PNG идут вне потока интерфейса
+        self.writer = SnapshotWriter(compression_level, parent=self)
+        self.writer.finished.connect(self.on_write_finished)
+
+        # История отмены по плиткам, плитки передаются в QML через image://tiles
+        self.history = TileHistory(undo_memory_limit)
+        self.tile_provider = TileImageProvider()
+
+        # Журнал штрихов для восстановления после аварийного завершения,
+        # открывается в start_journal
+        self.journal = StrokeJournal()
+        self.sync_timer = QTimer()
+        self.sync_timer.timeout.connect(self.sync_journal)
+        # Снимки журнала и fsync самого журнала идут в одном потоке записи
+        self.checkpoint_writer = SnapshotWriter(CHECKPOINT_COMPRESSION_LEVEL, fsync=True, parent=self)
+        self.checkpoint_writer.finished.connect(self.on_checkpoint_written)
+        # Путь снимка -> поколение журнала, которое от него начинается
+        self.checkpoint_generations = {}
+        # Шаги истории (history.absolute_position), известные текущему поколению
+        # журнала: более ранние уже в его снимке, более поздние - в хвосте повтора,
+        # оставшемся от прошлого поколения
+        self.journal_first_step = 0
+        self.journal_end_step = 0
+
         save_path = Path(self.SAVE_DIRECTORY)
         save_path.mkdir(parents=True, exist_ok=True)
         self.save_dir = str(save_path)
-    
+
+    @pyqtSlot()
+    def markDirty(self):
+        """Холст изменился: отложить сохранение до паузы в рисовании"""
+        if not self.dirty:
+            self.dirty = True
+            self.latency_timer.start(self.SAVE_MAX_LATENCY_MS)
+        self.debounce_timer.start(self.SAVE_DEBOUNCE_MS)
+
     def on_timer_timeout(self):
-        self.saveRequested.emit(self.hashPrint) 
+        self.debounce_timer.stop()
+        self.latency_timer.stop()
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.saveRequested.emit(self.hashPrint)
+
+    @pyqtSlot(str, QImage)
+    def saveImage(self, hashPrint, image):
+        """Передать снимок холста на запись; неизменившийся снимок не перезаписывается"""
+        filename = str(Path(self.save_dir) / f"canvas_{hashPrint}.png")
+        if self.writer.submit(image, filename):
+            self.stats['dropped'] += 1
+            self.statsChanged.emit()
+
+    @pyqtSlot(QImage, int, int, int, int, 'QVariantList')
+    def strokeFinished(self, image, x, y, width, height, strokes):
+        """
+        Снимок холста после штрихов кадра, их общий прямоугольник и сами штрихи:
+        [{color, thickness, smoothing, points: [x0, y0, x1, y1, ...]}]
+        """
+        if image.isNull():
+            self.strokesDropped(len(strokes))
+            return
+        if self.history.record(image, QRect(x, y, width, height)):
+            for index, stroke in enumerate(strokes):
+                self.journal.append_stroke(QColor(stroke['color']).rgba(), stroke['thickness'],
+                                           stroke['smoothing'], stroke['points'], joined=index > 0)
+            self.journal_end_step = self.history.absolute_position()
+            self.check_journal()
+        self.historyChanged.emit()
+
+    @pyqtSlot(int)
+    def strokesDropped(self, count):
+        """Снимок холста после штрихов не получен, в историю и журнал они не попали"""
+        print(f"Штрихов не попало в историю отмены и журнал: {count}")
+
+    @pyqtSlot()
+    def undo(self):
+        if not self.restore_tiles(self.history.undo()):
+            return
+        # Отменённый штрих уже в снимке поколения, воспроизведение его не уберёт
+        if self.history.absolute_position() < self.journal_first_step:
+            self.checkpoint_journal()
+            return
+        self.journal.append_undo()
+        self.check_journal()
+
+    @pyqtSlot()
+    def redo(self):
+        if not self.restore_tiles(self.history.redo()):
+            return
+        # Повторённого штриха нет в текущем поколении журнала
+        if self.history.absolute_position() > self.journal_end_step:
+            self.checkpoint_journal()
+            return
+        self.journal.append_redo()
+        self.check_journal()
+
+    def restore_tiles(self, tiles):
+        if not tiles:
+            return False
+        self.tilesRestored.emit([
+            {'x': x, 'y': y, 'width': tile.width(), 'height': tile.height(),
+             'source': self.tile_provider.add(tile)}
+            for x, y, tile in tiles
+        ])
+        self.historyChanged.emit()
+        self.markDirty()
+        return True
+
+    def start_journal(self, recovery=None, size=None):
+        """
+        Начать журнал штрихов. recovery - состояние из журнала прошлого запуска,
+        которым заменяется холст размера size
+        """
+        image = None
+        if recovery is not None:
+            image = recovery.render(size)
+            self.history.clear()
+            self.history.image = image
+            self.restore_tiles([(0, 0, image)])
+            print(f"Восстановлено штрихов из журнала: {len(recovery.strokes())}")
+        path, generation = self.journal.open(image is not None)
+        self.journal_first_step = self.journal_end_step = self.history.absolute_position()
+        self.write_checkpoint(path, generation, image)
+        self.sync_timer.start(self.JOURNAL_SYNC_MS)
+
+    def sync_journal(self):
+        if self.journal.file is not None:
+            self.checkpoint_writer.run(self.journal.sync)
+
+    def check_journal(self):
+        """Начать журнал заново от снимка холста, если в нём накопилось много записей"""
+        if self.journal.file is None or not self.journal.needs_checkpoint():
+            return
+        path, generation = self.journal.rotate()
+        self.journal_first_step = self.journal_end_step = self.history.absolute_position()
+        self.write_checkpoint(path, generation, self.history.image)
+
+    def checkpoint_journal(self):
+        """Начать журнал от снимка текущего холста, не продолжая прошлое поколение"""
+        path, generation = self.journal.rotate(reset=True)
+        self.journal_first_step = self.journal_end_step = self.history.absolute_position()
+        self.write_checkpoint(path, generation, self.history.image)
+
+    def write_checkpoint(self, path, generation, image):
+        """
+        Записать снимок поколения журнала в потоке записи; поколение без снимка
+        сразу становится основным
+        """
+        if path is None:
+            self.checkpoint_writer.run(partial(self.journal.checkpoint_written, generation))
+            return
+        self.checkpoint_generations[path] = generation
+        replaced = self.checkpoint_writer.submit(image.copy(), path)
+        if replaced is not None:
+            # Вытесненный снимок не будет записан, его поколение удалится вместе со старыми
+            self.checkpoint_generations.pop(replaced[1], None)
+
+    def on_checkpoint_written(self, result):
+        generation = self.checkpoint_generations.pop(result['filename'], None)
+        if result['status'] == 'failed':
+            print(f"Ошибка записи снимка журнала: {result['error']}")
+        elif generation is not None:
+            self.checkpoint_writer.run(partial(self.journal.checkpoint_written, generation))
+
+    @pyqtProperty(bool, notify=historyChanged)
+    def canUndo(self):
+        return self.history.can_undo()
+
+    @pyqtProperty(bool, notify=historyChanged)
+    def canRedo(self):
+        return self.history.can_redo()
+
+    def on_write_finished(self, result):
+        if result['status'] == 'saved':
+            self.stats['saves'] += 1
+            self.stats['bytes_written'] += result['bytes']
+            self.stats['encode_ms'] += result['encode_ms']
+            self.stats['last_encode_ms'] = result['encode_ms']
+            print(f"Canvas saved to: {result['filename']} ({result['encode_ms']:.1f} мс)")
+        elif result['status'] == 'skipped':
+            self.stats['skipped'] += 1
+        else:
+            self.stats['failed'] += 1
+            print(f"Ошибка сохранения холста: {result['error']}")
+        self.statsChanged.emit()
+
+    @pyqtProperty('QVariantMap', notify=statsChanged)
+    def saveStats(self):
+        """Счётчики автосохранения для QML"""
+        return dict(self.stats)
+
+    def shutdown(self):
+        """Дождаться записи последнего снимка и штатно закрыть журнал"""
+        self.writer.wait()
+        self.checkpoint_writer.wait()
+        self.sync_timer.stop()
+        self.journal.close()
 
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
 
     interface = Interface()
+    app.aboutToQuit.connect(interface.shutdown)
+
+    recovery = interface.journal.recover()
+    if recovery is not None and (recovery.steps or recovery.checkpoint):
+        answer = QMessageBox.question(
+            None, "Восстановление",
+            "Прошлый сеанс завершился некорректно. Восстановить рисунок из журнала "
+            f"({len(recovery.strokes())} штрихов)?")
+        if answer != QMessageBox.Yes:
+            recovery = None
+    else:
+        recovery = None
+
     engine = QQmlApplicationEngine()
+    engine.addImageProvider("tiles", interface.tile_provider)
     engine.rootContext().setContextProperty("_backend", interface)
     engine.load("mainWindow.qml")
 
@@ -39,4 +266,7 @@ if __name__ == '__main__':
         print("Ошибка: Не удалось загрузить QML файл!")
         sys.exit(-1)
 
+    canvas = engine.rootObjects()[0].findChild(QObject, "canvas")
+    interface.start_journal(recovery, QSize(int(canvas.property("width")), int(canvas.property("height"))))
+
     sys.exit(app.exec())
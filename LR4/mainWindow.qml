@@ -1,5 +1,5 @@
 
-import QtQuick 2.0
+import QtQuick 2.9
 import QtQuick.Window 2.3
 
 import "."
@@ -21,6 +21,7 @@ Window {
         property color paintColor: "#33B5E5"
         property int thickness: 1
         property int spacing: 4
+        property bool smoothing: true
 
         Column {
             spacing: tools.spacing
@@ -55,13 +56,52 @@ Window {
                         onClicked: tools.thickness = thickness
                     }
                 }
+
+                // Сглаживание линии кривыми
+                Circle {
+                    active: tools.smoothing
+                    thickness: 0
+                    text: "~"
+                    onClicked: tools.smoothing = !tools.smoothing
+                }
+
+                // Отмена и повтор (Ctrl+Z, Ctrl+Y)
+                Circle {
+                    active: false
+                    thickness: 0
+                    text: "↶"
+                    opacity: _backend.canUndo ? 1 : 0.4
+                    onClicked: canvas.undo()
+                }
+                Circle {
+                    active: false
+                    thickness: 0
+                    text: "↷"
+                    opacity: _backend.canRedo ? 1 : 0.4
+                    onClicked: canvas.redo()
+                }
             }
         }
 
+        // Счётчики автосохранения
+        Text {
+            anchors {
+                right: parent.right
+                bottom: parent.bottom
+                margins: 8
+            }
+            color: "#DDDDDD"
+            font.pixelSize: 12
+            text: "Сохранений: " + _backend.saveStats.saves
+                  + ", пропущено: " + _backend.saveStats.skipped
+                  + ", записано: " + Math.round(_backend.saveStats.bytes_written / 1024) + " КиБ"
+                  + ", кодирование: " + _backend.saveStats.last_encode_ms.toFixed(1) + " мс"
+        }
     }
 
     Canvas {
         id: canvas
+        objectName: "canvas"
         anchors {
             left: parent.left
             right: parent.right
@@ -72,48 +112,238 @@ Window {
 
         property real lastX
         property real lastY
+        // Последняя точка мыши - контрольная точка следующей кривой при сглаживании
+        property real controlX
+        property real controlY
         property color color: tools.paintColor
+        property bool smoothing: tools.smoothing
+        // Все точки мыши с прошлой отрисовки: {x, y}, {x, y, move: true} - начало линии,
+        // {end: true} - конец линии
+        property var pendingPoints: []
+        property real appliedWidth: 0
+        property string appliedColor: ""
+        // Координаты текущего штриха для журнала: x0, y0, x1, y1, ...
+        property var strokePoints: []
+        // Прямоугольник текущего штриха
+        property real strokeLeft
+        property real strokeTop
+        property real strokeRight
+        property real strokeBottom
+        // Плитки от отмены или повтора, ещё не нарисованные: {x, y, width, height, source}
+        property var pendingTiles: []
+        // Снимок после штриха ещё не получен: до него холст не меняется,
+        // чтобы в снимок попали ровно те штрихи, что переданы вместе с ним
+        property bool grabPending: false
+        // Отмена и повтор, нажатые до получения снимка: "undo" или "redo"
+        property var pendingActions: []
 
+        // Снимок холста кодирует и записывает backend
         function saveCanvas(hashPrint) {
-            var filename = "saved_canvas/canvas_" + hashPrint + ".png"
-            canvas.save(filename)
-            console.log("Canvas saved to:", filename)
+            canvas.grabToImage(function(result) {
+                _backend.saveImage(hashPrint, result.image)
+            }, Qt.size(canvas.width, canvas.height))
+        }
+
+        function addPoint(point) {
+            if (point.move) {
+                strokeLeft = strokeRight = point.x
+                strokeTop = strokeBottom = point.y
+                strokePoints = [point.x, point.y]
+            } else if (point.end) {
+                // Конец штриха запоминает его прямоугольник с запасом на толщину линии
+                // и сам штрих для журнала
+                var pad = tools.thickness + 2
+                point.rect = Qt.rect(strokeLeft - pad, strokeTop - pad,
+                                     strokeRight - strokeLeft + 2 * pad,
+                                     strokeBottom - strokeTop + 2 * pad)
+                point.stroke = {
+                    color: canvas.color.toString(),
+                    thickness: tools.thickness,
+                    smoothing: tools.smoothing,
+                    points: strokePoints
+                }
+                strokePoints = []
+            } else {
+                strokePoints.push(point.x, point.y)
+                strokeLeft = Math.min(strokeLeft, point.x)
+                strokeTop = Math.min(strokeTop, point.y)
+                strokeRight = Math.max(strokeRight, point.x)
+                strokeBottom = Math.max(strokeBottom, point.y)
+            }
+            pendingPoints.push(point)
+            requestPaint()
         }
 
+        // Снимок холста после штрихов - для истории отмены и журнала
+        function finishStroke(rect, strokes) {
+            grabPending = true
+            var started = canvas.grabToImage(function(result) {
+                _backend.strokeFinished(result.image, Math.floor(rect.x), Math.floor(rect.y),
+                                        Math.ceil(rect.width), Math.ceil(rect.height), strokes)
+                grabFinished()
+            }, Qt.size(canvas.width, canvas.height))
+            if (!started) {
+                _backend.strokesDropped(strokes.length)
+                grabFinished()
+            }
+        }
+
+        // Штрихи уже в истории: выполнить отложенные отмены и повторы
+        // и дорисовать накопленное за время ожидания
+        function grabFinished() {
+            grabPending = false
+            var actions = pendingActions
+            pendingActions = []
+            for (var i = 0; i < actions.length; i++) {
+                if (actions[i] === "undo")
+                    _backend.undo()
+                else
+                    _backend.redo()
+            }
+            requestPaint()
+        }
+
+        function undo() {
+            if (grabPending)
+                pendingActions.push("undo")
+            else
+                _backend.undo()
+        }
+
+        function redo() {
+            if (grabPending)
+                pendingActions.push("redo")
+            else
+                _backend.redo()
+        }
+
+        function restoreTiles(tiles) {
+            for (var i = 0; i < tiles.length; i++) {
+                pendingTiles.push(tiles[i])
+                loadImage(tiles[i].source)
+            }
+        }
+
+        // Плитки рисуются строго по порядку: до первой ещё не загруженной
+        function drawTiles(ctx) {
+            var i = 0
+            for (; i < pendingTiles.length; i++) {
+                var tile = pendingTiles[i]
+                if (!isImageLoaded(tile.source))
+                    break
+                ctx.clearRect(tile.x, tile.y, tile.width, tile.height)
+                ctx.drawImage(tile.source, tile.x, tile.y)
+                unloadImage(tile.source)
+            }
+            pendingTiles = pendingTiles.slice(i)
+        }
+
+        onImageLoaded: requestPaint()
+
+        // Все накопленные точки рисуются одним путём за кадр,
+        // состояние контекста меняется только при смене цвета или толщины
         onPaint: {
+            if (grabPending)
+                return
             var ctx = getContext("2d")
-            ctx.lineWidth = tools.thickness
-            ctx.strokeStyle = canvas.color
-            ctx.beginPath()
-            ctx.moveTo(lastX, lastY)
+            if (pendingTiles.length > 0)
+                drawTiles(ctx)
+            // Точки рисуются поверх плиток отмены, поэтому ждут их загрузки
+            if (pendingPoints.length === 0 || pendingTiles.length > 0)
+                return
 
-            lastX = paint_area.mouseX
-            lastY = paint_area.mouseY
+            if (appliedWidth !== tools.thickness) {
+                ctx.lineWidth = tools.thickness
+                ctx.lineCap = "round"
+                ctx.lineJoin = "round"
+                appliedWidth = tools.thickness
+            }
+            if (appliedColor !== canvas.color.toString()) {
+                ctx.strokeStyle = canvas.color
+                appliedColor = canvas.color.toString()
+            }
+
+            var points = pendingPoints
+            pendingPoints = []
+            var x = lastX, y = lastY
+            var cx = controlX, cy = controlY
+            var strokeRect = null
+            var strokes = []
 
-            ctx.lineTo(lastX, lastY)
+            ctx.beginPath()
+            ctx.moveTo(x, y)
+            for (var i = 0; i < points.length; i++) {
+                var point = points[i]
+                if (point.move) {
+                    x = cx = point.x
+                    y = cy = point.y
+                    ctx.moveTo(x, y)
+                } else if (point.end) {
+                    // Хвост от середины последнего отрезка до последней точки
+                    if (smoothing && (cx !== x || cy !== y))
+                        ctx.lineTo(cx, cy)
+                    x = cx
+                    y = cy
+                    // Несколько штрихов за кадр попадают в один шаг истории
+                    strokeRect = strokeRect ? unite(strokeRect, point.rect) : point.rect
+                    strokes.push(point.stroke)
+                } else if (smoothing) {
+                    // Кривая через точку мыши до середины следующего отрезка
+                    x = (cx + point.x) / 2
+                    y = (cy + point.y) / 2
+                    ctx.quadraticCurveTo(cx, cy, x, y)
+                    cx = point.x
+                    cy = point.y
+                } else {
+                    x = cx = point.x
+                    y = cy = point.y
+                    ctx.lineTo(x, y)
+                }
+            }
             ctx.stroke()
+
+            lastX = x
+            lastY = y
+            controlX = cx
+            controlY = cy
+            _backend.markDirty()
+            if (strokeRect)
+                finishStroke(strokeRect, strokes)
+        }
+
+        function unite(a, b) {
+            var left = Math.min(a.x, b.x), top = Math.min(a.y, b.y)
+            return Qt.rect(left, top, Math.max(a.x + a.width, b.x + b.width) - left,
+                           Math.max(a.y + a.height, b.y + b.height) - top)
         }
 
         MouseArea {
             id: paint_area
             anchors.fill: parent
 
-            onPressed: {
-                canvas.lastX = mouseX
-                canvas.lastY = mouseY
-            }
-
-            onPositionChanged: {
-                canvas.requestPaint()
-            }
+            onPressed: canvas.addPoint({ x: mouse.x, y: mouse.y, move: true })
+            onPositionChanged: canvas.addPoint({ x: mouse.x, y: mouse.y })
+            onReleased: canvas.addPoint({ end: true })
         }
     }
 
-    // Подключение к сигналу сохранения от backend
+    Shortcut {
+        sequences: [StandardKey.Undo]
+        onActivated: canvas.undo()
+    }
+    Shortcut {
+        sequences: [StandardKey.Redo, "Ctrl+Y"]
+        onActivated: canvas.redo()
+    }
+
+    // Подключение к сигналам backend
     Connections {
         target: _backend
         function onSaveRequested(hashPrint) {
             canvas.saveCanvas(hashPrint)
         }
+        function onTilesRestored(tiles) {
+            canvas.restoreTiles(tiles)
+        }
     }
 }
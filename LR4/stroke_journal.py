@@ -0,0 +1,345 @@
+import os
+import re
+import struct
+import threading
+import zlib
+
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QImage, QPainter, QPainterPath, QPen, QColor
+
+
+JOURNAL_DIRECTORY = "journal"
+# После стольких записей журнал начинается заново от снимка холста,
+# чтобы восстановление не воспроизводило всю историю рисования
+CHECKPOINT_RECORDS = 500
+# Снимки журнала служебные, их важнее записать быстро, чем сжать
+CHECKPOINT_COMPRESSION_LEVEL = 1
+
+MAGIC = b'LR4J\x01'
+# Заголовок записи: тип, длина данных; после данных - CRC32 заголовка и данных
+RECORD_HEADER = struct.Struct('<BI')
+RECORD_CRC = struct.Struct('<I')
+# Штрих: цвет RGBA, толщина, флаги, число точек; затем точки парами int16
+STROKE_HEADER = struct.Struct('<IBBI')
+
+RECORD_STROKE = 1
+RECORD_UNDO = 2
+RECORD_REDO = 3
+# Начало поколения журнала: имя PNG-снимка холста, пустое - чистый холст
+RECORD_CHECKPOINT = 4
+# Штатное завершение программы
+RECORD_END = 5
+# Начало поколения не с состояния предыдущего (отмена шага из снимка, новый сеанс),
+# данные - как у RECORD_CHECKPOINT. Пока снимок не записан, поколение не воспроизводится
+RECORD_RESET = 6
+
+FLAG_SMOOTHING = 1
+# Штрих нарисован в том же кадре, что и предыдущий, и отменяется вместе с ним
+FLAG_JOINED = 2
+
+JOURNAL_NAME_RE = re.compile(r'^journal_(\d+)\.bin$')
+
+
+def journal_name(generation):
+    return f'journal_{generation}.bin'
+
+
+def checkpoint_name(generation):
+    return f'checkpoint_{generation}.png'
+
+
+def encode_stroke(rgba, thickness, flags, points):
+    """points - плоский список координат x0, y0, x1, y1, ..."""
+    coordinates = [min(max(int(round(value)), -32768), 32767) for value in points]
+    count = len(coordinates) // 2
+    return (STROKE_HEADER.pack(rgba, min(max(int(thickness), 0), 255), flags, count)
+            + struct.pack(f'<{count * 2}h', *coordinates[:count * 2]))
+
+
+def decode_stroke(payload):
+    rgba, thickness, flags, count = STROKE_HEADER.unpack_from(payload)
+    coordinates = struct.unpack_from(f'<{count * 2}h', payload, STROKE_HEADER.size)
+    points = list(zip(coordinates[::2], coordinates[1::2]))
+    return {'rgba': rgba, 'thickness': thickness, 'flags': flags, 'points': points}
+
+
+def read_records(path):
+    """
+    Записи журнала [(тип, данные)] и признак того, что файл прочитан до конца.
+    Чтение останавливается на недописанной или повреждённой записи.
+    """
+    records = []
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        return records, False
+    offset = len(MAGIC)
+    while offset < len(data):
+        end = offset + RECORD_HEADER.size
+        if end > len(data):
+            return records, False
+        record_type, length = RECORD_HEADER.unpack_from(data, offset)
+        if end + length + RECORD_CRC.size > len(data):
+            return records, False
+        (crc,) = RECORD_CRC.unpack_from(data, end + length)
+        if zlib.crc32(data[offset:end + length]) != crc:
+            return records, False
+        records.append((record_type, data[end:end + length]))
+        offset = end + length + RECORD_CRC.size
+    return records, True
+
+
+def render_strokes(image, strokes):
+    """Нарисовать штрихи так же, как их рисует холст QML"""
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    for stroke in strokes:
+        points = stroke['points']
+        if len(points) < 2:
+            continue
+        pen = QPen(QColor.fromRgba(stroke['rgba']), stroke['thickness'],
+                   Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
+        path = QPainterPath(QPointF(*points[0]))
+        if stroke['flags'] & FLAG_SMOOTHING:
+            # Кривые через точки мыши до середин отрезков и хвост до последней точки
+            cx, cy = points[0]
+            for x, y in points[1:]:
+                path.quadTo(cx, cy, (cx + x) / 2, (cy + y) / 2)
+                cx, cy = x, y
+            path.lineTo(cx, cy)
+        else:
+            for x, y in points[1:]:
+                path.lineTo(x, y)
+        painter.strokePath(path, pen)
+    painter.end()
+
+
+class Recovery:
+    """Состояние холста, восстановленное из журнала после аварийного завершения"""
+
+    def __init__(self, checkpoint, steps, records):
+        # PNG-снимок, от которого начинается воспроизведение, или None
+        self.checkpoint = checkpoint
+        # Неотменённые шаги: списки штрихов
+        self.steps = steps
+        self.records = records
+
+    def strokes(self):
+        return [stroke for step in self.steps for stroke in step]
+
+    def render(self, size):
+        """Холст заданного размера: снимок и воспроизведённые поверх него штрихи"""
+        image = QImage(size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        if self.checkpoint is not None:
+            painter = QPainter(image)
+            painter.drawImage(0, 0, QImage(self.checkpoint))
+            painter.end()
+        render_strokes(image, self.strokes())
+        return image
+
+
+class StrokeJournal:
+    """
+    Журнал штрихов: двоичный файл, в который только дописываются записи.
+
+    Записи буферизуются и сбрасываются на диск с fsync пачками (sync)
+    в потоке записи снимков.
+    Журнал делится на поколения: каждое начинается со снимка холста
+    checkpoint_<n>.png, и старые поколения удаляются, когда снимок записан.
+    Последняя запись штатно закрытого журнала - RECORD_END, её отсутствие
+    означает аварийное завершение.
+    """
+
+    def __init__(self, directory=JOURNAL_DIRECTORY, checkpoint_records=CHECKPOINT_RECORDS):
+        self.directory = directory
+        self.checkpoint_records = checkpoint_records
+        self.file = None
+        self.generation = 0
+        # Записей в текущем поколении
+        self.records = 0
+        self.unsynced = False
+        # Файлы прошлых поколений, которые ещё нужно сбросить на диск и закрыть
+        self.retired = []
+        # append и смена поколения идут в потоке интерфейса, sync - в потоке записи
+        self.lock = threading.Lock()
+        self.stats = {'records': 0, 'bytes': 0, 'syncs': 0, 'checkpoints': 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def generations(self):
+        """Номера поколений журнала на диске по возрастанию"""
+        result = []
+        for name in os.listdir(self.directory):
+            match = JOURNAL_NAME_RE.match(name)
+            if match is not None:
+                result.append(int(match.group(1)))
+        return sorted(result)
+
+    def recover(self):
+        """
+        Состояние холста из журнала, если прошлый запуск завершился аварийно,
+        иначе None
+        """
+        generations = self.generations()
+        if not generations:
+            return None
+        journals = {generation: read_records(self.path(journal_name(generation)))
+                    for generation in generations}
+        records, complete = journals[generations[-1]]
+        if complete and records and records[-1][0] == RECORD_END:
+            return None
+
+        # Воспроизведение начинается с последнего поколения, снимок которого записан
+        start = 0
+        checkpoint = None
+        for index in range(len(generations) - 1, -1, -1):
+            records = journals[generations[index]][0]
+            if not records or records[0][0] not in (RECORD_CHECKPOINT, RECORD_RESET):
+                continue
+            name = records[0][1].decode('utf-8')
+            if name and not os.path.exists(self.path(name)):
+                continue
+            checkpoint = self.path(name) if name else None
+            start = index
+            break
+
+        steps = []
+        position = 0
+        count = 0
+        for generation in generations[start:]:
+            records = journals[generation][0]
+            if generation != generations[start] and records and records[0][0] == RECORD_RESET:
+                # Снимок, от которого начато это поколение, не записан,
+                # а состояние предыдущего его записи не продолжают
+                break
+            for record_type, payload in records:
+                count += 1
+                if record_type == RECORD_STROKE:
+                    stroke = decode_stroke(payload)
+                    if stroke['flags'] & FLAG_JOINED and position > 0 and position == len(steps):
+                        steps[-1].append(stroke)
+                    else:
+                        del steps[position:]
+                        steps.append([stroke])
+                        position += 1
+                elif record_type == RECORD_UNDO:
+                    # Отмена шага из снимка в журнал не пишется: вместо неё
+                    # backend начинает новое поколение (checkpoint)
+                    position = max(position - 1, 0)
+                elif record_type == RECORD_REDO:
+                    position = min(position + 1, len(steps))
+        return Recovery(checkpoint, steps[:position], count)
+
+    def open(self, checkpoint=False):
+        """
+        Начать новый журнал, не продолжающий файлы прошлых запусков; checkpoint=True -
+        от снимка холста. Возвращает то же, что rotate
+        """
+        generations = self.generations()
+        self.generation = generations[-1] if generations else 0
+        return self.rotate(checkpoint, reset=True)
+
+    def start_generation(self, checkpoint, reset=False):
+        with self.lock:
+            if self.file is not None:
+                # Старый файл сбросит на диск и закроет sync в потоке записи
+                self.retired.append(self.file)
+            self.file = open(self.path(journal_name(self.generation)), 'wb')
+            self.file.write(MAGIC)
+            self.records = 0
+        name = checkpoint_name(self.generation) if checkpoint else ''
+        self.append(RECORD_RESET if reset else RECORD_CHECKPOINT, name.encode('utf-8'))
+
+    def append(self, record_type, payload=b''):
+        header = RECORD_HEADER.pack(record_type, len(payload))
+        record = header + payload + RECORD_CRC.pack(zlib.crc32(header + payload))
+        with self.lock:
+            self.file.write(record)
+            self.records += 1
+            self.unsynced = True
+            self.stats['records'] += 1
+            self.stats['bytes'] += len(record)
+
+    def append_stroke(self, rgba, thickness, smoothing, points, joined=False):
+        flags = (FLAG_SMOOTHING if smoothing else 0) | (FLAG_JOINED if joined else 0)
+        self.append(RECORD_STROKE, encode_stroke(rgba, thickness, flags, points))
+
+    def append_undo(self):
+        self.append(RECORD_UNDO)
+
+    def append_redo(self):
+        self.append(RECORD_REDO)
+
+    def needs_checkpoint(self):
+        return self.records >= self.checkpoint_records
+
+    def rotate(self, checkpoint=True, reset=False):
+        """
+        Начать следующее поколение: checkpoint=True - от снимка холста, reset=True -
+        не продолжая состояние предыдущего. Возвращает путь, по которому нужно
+        записать снимок (None без снимка), и номер поколения для checkpoint_written
+        """
+        self.generation += 1
+        self.start_generation(checkpoint, reset)
+        if not checkpoint:
+            return None, self.generation
+        self.stats['checkpoints'] += 1
+        return self.path(checkpoint_name(self.generation)), self.generation
+
+    def checkpoint_written(self, generation):
+        """
+        Снимок поколения записан: сбросить журнал на диск и удалить более старые
+        поколения. Вызывается в потоке записи
+        """
+        self.sync()
+        self.remove_before(generation)
+
+    def remove_before(self, generation):
+        for name in os.listdir(self.directory):
+            match = re.match(r'^(?:journal|checkpoint)_(\d+)\.(?:bin|png)$', name)
+            if match is not None and int(match.group(1)) < generation:
+                try:
+                    os.remove(self.path(name))
+                except OSError:
+                    pass
+
+    def sync(self):
+        """
+        Сбросить накопленные записи на диск. fsync идёт без блокировки,
+        поэтому append из потока интерфейса его не ждёт
+        """
+        with self.lock:
+            retired, self.retired = self.retired, []
+            files = list(retired)
+            if self.file is not None and self.unsynced:
+                files.append(self.file)
+            self.unsynced = False
+            descriptors = []
+            for file in files:
+                file.flush()
+                descriptors.append(os.dup(file.fileno()))
+            for file in retired:
+                file.close()
+        if not descriptors:
+            return
+        try:
+            for descriptor in descriptors:
+                os.fsync(descriptor)
+        finally:
+            for descriptor in descriptors:
+                os.close(descriptor)
+        with self.lock:
+            self.stats['syncs'] += 1
+
+    def close(self):
+        """Штатно закрыть журнал"""
+        if self.file is None:
+            return
+        self.append(RECORD_END)
+        self.sync()
+        with self.lock:
+            self.file.close()
+            self.file = None
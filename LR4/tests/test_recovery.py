@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+from PyQt5.QtCore import QSize, QRect
+from PyQt5.QtGui import QGuiApplication, QImage
+from PyQt5.QtCore import Qt
+
+from main import Interface
+from stroke_journal import StrokeJournal, render_strokes, checkpoint_name, FLAG_SMOOTHING
+from undo_history import IMAGE_FORMAT
+
+
+SIZE = QSize(400, 300)
+app = QGuiApplication.instance() or QGuiApplication([])
+
+
+@pytest.fixture
+def interface(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    interface = Interface()
+    interface.journal.checkpoint_records = 5
+    interface.start_journal(None, SIZE)
+    canvas = QImage(SIZE, IMAGE_FORMAT)
+    canvas.fill(Qt.transparent)
+    interface.canvas = canvas
+    yield interface
+    interface.writer.wait()
+    interface.checkpoint_writer.wait()
+
+
+def draw(interface, y):
+    """Штрих, как его присылает холст QML: снимок холста, прямоугольник и данные"""
+    points = [20, y, 200, y + 10, 380, y]
+    if interface.history.image is not None:
+        interface.canvas = interface.history.image.copy()
+    render_strokes(interface.canvas, [{
+        'rgba': 0xff33b5e5, 'thickness': 3, 'flags': FLAG_SMOOTHING,
+        'points': list(zip(points[::2], points[1::2])),
+    }])
+    interface.strokeFinished(interface.canvas.copy(), 0, y - 10, 400, 30, [{
+        'color': '#33b5e5', 'thickness': 3, 'smoothing': True, 'points': points,
+    }])
+
+
+def recovered(interface):
+    # Аварийное завершение: журнал не закрыт, записи сброшены таймером fsync
+    interface.checkpoint_writer.wait()
+    interface.journal.sync()
+    recovery = StrokeJournal(interface.journal.directory).recover()
+    assert recovery is not None
+    return recovery.render(SIZE)
+
+
+def test_undo_across_rotation(interface):
+    for y in (30, 90, 150, 210):
+        draw(interface, y)
+    # Четвёртый штрих начал новое поколение, все штрихи уже в его снимке
+    assert interface.journal.stats['checkpoints'] == 1
+    interface.undo()
+    assert recovered(interface) == interface.history.image
+
+
+def test_redo_across_rotation(interface):
+    for y in (30, 90, 150, 210):
+        draw(interface, y)
+    interface.undo()
+    interface.undo()
+    interface.redo()
+    assert recovered(interface) == interface.history.image
+
+
+def test_unwritten_reset_checkpoint_is_not_replayed(interface):
+    for y in (30, 90, 150, 210):
+        draw(interface, y)
+    before_undo = interface.history.image.copy()
+    interface.undo()
+    draw(interface, 250)
+    # Сбой до записи снимка нового поколения: воспроизводится прошлое поколение целиком
+    interface.checkpoint_writer.wait()
+    os.remove(os.path.join(interface.journal.directory,
+                           checkpoint_name(interface.journal.generation)))
+    assert recovered(interface) == before_undo
+
+
+def test_replaced_checkpoint_is_forgotten(interface):
+    draw(interface, 30)
+    # Поток записи занят, второй снимок вытесняет ещё не начатый первый
+    release = threading.Event()
+    interface.checkpoint_writer.run(release.wait)
+    interface.checkpoint_journal()
+    interface.checkpoint_journal()
+    assert len(interface.checkpoint_generations) == 1
+    release.set()
+    interface.checkpoint_writer.wait()
+    app.processEvents()
+    interface.checkpoint_writer.wait()
+    assert interface.checkpoint_generations == {}
+    assert interface.journal.generations() == [interface.journal.generation]
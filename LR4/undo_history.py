@@ -0,0 +1,191 @@
+import os
+import zlib
+import threading
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtQuick import QQuickImageProvider
+
+
+# Сторона плитки в пикселях
+TILE_SIZE = 64
+# Предел памяти истории в байтах, можно переопределить переменной окружения (в МиБ)
+UNDO_MEMORY_LIMIT = int(os.environ.get('LR4_UNDO_MEMORY_MB', 32)) * 1024 * 1024
+# Столько последних шагов хранится несжатыми, более старые сжимаются zlib
+UNCOMPRESSED_ENTRIES = 4
+IMAGE_FORMAT = QImage.Format_ARGB32_Premultiplied
+
+
+def image_bytes(image):
+    bits = image.constBits()
+    bits.setsize(image.byteCount())
+    return bits.asstring()
+
+
+def bytes_image(data, width, height):
+    # copy() отвязывает изображение от буфера data
+    return QImage(data, width, height, width * 4, IMAGE_FORMAT).copy()
+
+
+class HistoryEntry:
+    """Один шаг истории: плитки (x, y, ширина, высота, до, после), изменённые штрихом"""
+
+    def __init__(self, tiles):
+        self.tiles = tiles
+        self.compressed = False
+        self.size = self.tiles_size()
+
+    def tiles_size(self):
+        return sum(len(before) + len(after) for *_, before, after in self.tiles)
+
+    def compress(self):
+        self.tiles = [(x, y, width, height, zlib.compress(before), zlib.compress(after))
+                      for x, y, width, height, before, after in self.tiles]
+        self.compressed = True
+        self.size = self.tiles_size()
+
+    def images(self, undo):
+        """Плитки состояния до шага (undo=True) или после него: [(x, y, QImage)]"""
+        result = []
+        for x, y, width, height, before, after in self.tiles:
+            data = before if undo else after
+            if self.compressed:
+                data = zlib.decompress(data)
+            result.append((x, y, bytes_image(data, width, height)))
+        return result
+
+
+class TileHistory:
+    """
+    История отмены по плиткам.
+
+    После каждого штриха сравниваются только плитки, задетые его прямоугольником,
+    и запоминаются изменившиеся - до и после штриха. Отмена и повтор возвращают
+    лишь эти плитки, поэтому перерисовывается только затронутая часть холста.
+    """
+
+    def __init__(self, memory_limit=UNDO_MEMORY_LIMIT, tile_size=TILE_SIZE):
+        self.memory_limit = memory_limit
+        self.tile_size = tile_size
+        self.entries = []
+        # Сколько шагов из entries применено к холсту
+        self.position = 0
+        # Сколько шагов ушло из начала истории (вытеснены или сброшены);
+        # evicted + position - номер шага, не зависящий от вытеснения
+        self.evicted = 0
+        self.memory = 0
+        # Текущее состояние холста
+        self.image = None
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.entries)
+
+    def absolute_position(self):
+        return self.evicted + self.position
+
+    def clear(self):
+        self.evicted += self.position
+        self.entries = []
+        self.position = 0
+        self.memory = 0
+
+    def record(self, image, rect):
+        """
+        Запомнить штрих: image - холст после него, rect - прямоугольник штриха.
+        Возвращает False, если штрих не изменил холст
+        """
+        image = image.convertToFormat(IMAGE_FORMAT)
+        if self.image is None:
+            # Холст изначально прозрачный
+            self.image = QImage(image.size(), IMAGE_FORMAT)
+            self.image.fill(Qt.transparent)
+        elif self.image.size() != image.size():
+            # Размер холста изменился, старые плитки к нему не подходят
+            self.clear()
+            self.image = image
+            return True
+
+        tiles = []
+        rect = rect.intersected(image.rect())
+        size = self.tile_size
+        for y in range(rect.top() // size * size, rect.bottom() + 1, size):
+            for x in range(rect.left() // size * size, rect.right() + 1, size):
+                tile = QRect(x, y, size, size).intersected(image.rect())
+                before = image_bytes(self.image.copy(tile))
+                after = image_bytes(image.copy(tile))
+                if before != after:
+                    tiles.append((tile.x(), tile.y(), tile.width(), tile.height(), before, after))
+        self.image = image
+        if not tiles:
+            return False
+
+        # Новый шаг отменяет возможность повтора
+        for entry in self.entries[self.position:]:
+            self.memory -= entry.size
+        del self.entries[self.position:]
+        entry = HistoryEntry(tiles)
+        self.entries.append(entry)
+        self.position += 1
+        self.memory += entry.size
+
+        for entry in self.entries[:-UNCOMPRESSED_ENTRIES]:
+            if not entry.compressed:
+                self.memory -= entry.size
+                entry.compress()
+                self.memory += entry.size
+        # Самые старые шаги вытесняются, последний остаётся всегда
+        while self.memory > self.memory_limit and len(self.entries) > 1:
+            self.memory -= self.entries.pop(0).size
+            self.position -= 1
+            self.evicted += 1
+        return True
+
+    def undo(self):
+        """Отменить шаг. Возвращает плитки для перерисовки: [(x, y, QImage)]"""
+        if not self.can_undo():
+            return []
+        self.position -= 1
+        return self.apply(self.entries[self.position].images(undo=True))
+
+    def redo(self):
+        """Повторить шаг. Возвращает плитки для перерисовки: [(x, y, QImage)]"""
+        if not self.can_redo():
+            return []
+        self.position += 1
+        return self.apply(self.entries[self.position - 1].images(undo=False))
+
+    def apply(self, tiles):
+        painter = QPainter(self.image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for x, y, tile in tiles:
+            painter.drawImage(x, y, tile)
+        painter.end()
+        return tiles
+
+
+class TileImageProvider(QQuickImageProvider):
+    """Отдаёт QML плитки для перерисовки по адресам image://tiles/<номер>"""
+
+    def __init__(self):
+        super().__init__(QQuickImageProvider.Image)
+        self.lock = threading.Lock()
+        self.images = {}
+        self.counter = 0
+
+    def add(self, image):
+        """Зарегистрировать плитку, возвращает её адрес"""
+        with self.lock:
+            self.counter += 1
+            self.images[str(self.counter)] = image
+        return f'image://tiles/{self.counter}'
+
+    def requestImage(self, id, requestedSize):
+        # Каждая плитка загружается один раз
+        with self.lock:
+            image = self.images.pop(id, None)
+        if image is None:
+            image = QImage()
+        return image, image.size()